@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+# Catalog of sensors and lenses kept in a SQLite file. Every sensor and lens
+# combination is evaluated over a range of tilt angles for a template
+# configuration (height, pan, range, resolution, roll) and ranked by the
+# ground area on which the footprint meets the resolution. The shortlist
+# comes back as ready to save Configurations.
+#
+# Sensors are imported from csv lines of name,ix,iy,ixmm,iymm and lenses
+# from name,focal_mm[,max_focal_mm[,k1,k2,k3,p1,p2]], header lines skipped.
+# Importing a name already in the catalog replaces it.
+
+import argparse
+import csv
+import math
+import sqlite3
+import numpy
+import geoCamEngine
+from geoCamEngine import Configuration
+
+schema = '''
+create table if not exists sensors (id integer primary key, name text unique not null,
+                                    ix integer not null, iy integer not null, ixmm real not null, iymm real not null);
+create table if not exists lenses (id integer primary key, name text unique not null,
+                                   focal_mm real not null, max_focal_mm real not null,
+                                   k1 real default 0, k2 real default 0, k3 real default 0, p1 real default 0, p2 real default 0);
+create index if not exists sensors_iy on sensors (iy);
+create index if not exists lenses_focal on lenses (focal_mm);
+'''
+
+sensor_fields = ('name','ix','iy','ixmm','iymm')
+lens_fields = ('name','focal_mm','max_focal_mm')+Configuration.lens
+
+def openCatalog(fname):
+    db = sqlite3.connect(fname)
+    db.executescript(schema)
+    return db
+
+def readRows(infile, types):
+    # Rows of a csv converted with types, skipping headers and short lines.
+    # Missing trailing values are returned as None.
+    for row in csv.reader(infile):
+        if not row or row[0].startswith('#'):
+            continue
+        try:
+            yield tuple(t(row[i]) if i < len(row) and row[i].strip() else None for i, t in enumerate(types))
+        except ValueError:
+            continue
+
+def importSensors(db, infile):
+    rows = [r for r in readRows(infile, (str,int,int,float,float)) if None not in r]
+    with db:
+        # upserts keep the id, and so the order, of sensors imported again
+        db.executemany('insert into sensors (name,ix,iy,ixmm,iymm) values (?,?,?,?,?) '
+                       'on conflict(name) do update set ix = excluded.ix, iy = excluded.iy, ixmm = excluded.ixmm, iymm = excluded.iymm', rows)
+    return len(rows)
+
+def importLenses(db, infile):
+    rows = []
+    for r in readRows(infile, (str,float,float)+(float,)*len(Configuration.lens)):
+        if r[0] is None or r[1] is None:
+            continue
+        # a fixed lens zooms from its focal length to itself
+        rows.append((r[0],r[1],r[2] or r[1])+tuple(c or 0.0 for c in r[3:]))
+    with db:
+        db.executemany('insert into lenses ('+','.join(lens_fields)+') values ('+','.join('?'*len(lens_fields))+') '
+                       'on conflict(name) do update set '+', '.join(f+' = excluded.'+f for f in lens_fields[1:]), rows)
+    return len(rows)
+
+def combinations(db, minFocal=None, maxFocal=None, minRows=None):
+    # (sensor, lens, values) of every combination, optionally limited to
+    # lenses of focal length (mm) and sensors of at least minRows rows.
+    # Ordered by sensor so consecutive combinations share imager sizes.
+    where = []
+    args = []
+    if minFocal is not None:
+        where.append('l.focal_mm >= ?')
+        args.append(minFocal)
+    if maxFocal is not None:
+        where.append('l.focal_mm <= ?')
+        args.append(maxFocal)
+    if minRows is not None:
+        where.append('s.iy >= ?')
+        args.append(minRows)
+    query = ('select s.name,'+','.join('s.'+f for f in sensor_fields[1:])+',l.name,'+','.join('l.'+f for f in lens_fields[1:])+
+             ' from sensors s, lenses l'+(' where '+' and '.join(where) if where else '')+' order by s.id, l.focal_mm')
+    for row in db.execute(query, args):
+        sensor = row[0]
+        ix, iy, ixmm, iymm = row[1:5]
+        lens = row[5]
+        focal, max_focal = row[6:8]
+        values = {'ix':ix, 'iy':iy, 'ixmm':ixmm, 'iymm':iymm,
+                  'fx':focal*ix/ixmm, 'fy':focal*iy/iymm, 'max_zoom':max_focal/focal}
+        values.update(zip(Configuration.lens, row[8:]))
+        yield sensor, lens, values
+
+def areaBound(values):
+    # Upper bound of FootprintBatch.usableArea over every tilt angle. Ray
+    # pairs at least d apart only meet the resolution out to the range where
+    # cot(a)-cot(a+d) = resolution/height, which has a closed form. The pairs
+    # where the roll blocks meet can be closer, but each of those adds at
+    # most range*resolution per radian of width. Strong distortion can fold
+    # the rows over, in which case only the range limits the bound.
+    table = geoCamEngine.rayTable(values, 1.0)
+    h = values['height']
+    d = numpy.diff(table.rows).min()
+    c = math.cos(d)-2.0*h*math.sin(d)/values['resolution']
+    if d <= 0.0:
+        reach = values['range']
+    elif c < -1.0:
+        reach = 0.0
+    else:
+        a = (math.acos(min(c,1.0))-d)/2.0
+        reach = h/math.tan(a) if a > 0.0 else values['range']
+    reach = min(reach, values['range'])
+    return (table.right-table.left)*(reach**2/2.0+2.0*values['range']*values['resolution'])
+
+def rank(combos, template, tilts, count=20, chunk=256):
+    # Evaluates every combination at each of tilts with the other values of
+    # template and returns the best count as (label, Configuration, area,
+    # max range), best first. Each combination keeps its best tilt.
+    # Combinations are evaluated in order of areaBound and the search stops
+    # once no remaining combination can make the shortlist.
+    tilts = list(tilts)
+    candidates = []
+    for sensor, lens, values in combos:
+        v = dict(template)
+        v.update(values)
+        candidates.append((areaBound(v), sensor, lens, v))
+    candidates.sort(key=lambda c: -c[0])
+
+    results = []
+    pending = []
+    def evaluate():
+        valuesList = []
+        for bound, sensor, lens, values in pending:
+            for t in tilts:
+                v = dict(values)
+                v['tilt_angle'] = float(t)
+                valuesList.append(v)
+        area, max_range = geoCamEngine.FootprintBatch(valuesList).usableArea()
+        area = area.reshape((len(pending),len(tilts)))
+        max_range = max_range.reshape(area.shape)
+        best = area.argmax(axis=1)
+        for i, (bound, sensor, lens, values) in enumerate(pending):
+            results.append((area[i,best[i]], max_range[i,best[i]], sensor, lens, valuesList[i*len(tilts)+best[i]]))
+        # only the shortlist needs to be kept
+        results.sort(key=lambda r: (-r[0], -r[1]))
+        del results[count:]
+
+    for c in candidates:
+        if len(results) == count and c[0] < results[-1][0]:
+            break
+        pending.append(c)
+        if len(pending)*len(tilts) >= chunk:
+            evaluate()
+            pending = []
+    if pending:
+        evaluate()
+
+    shortlist = []
+    for area, max_range, sensor, lens, values in results:
+        config = Configuration()
+        config.values.update(values)
+        config.description = sensor+', '+lens
+        shortlist.append((sensor+' / '+lens, config, area, max_range))
+    return shortlist
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sensor and lens catalog.')
+    parser.add_argument('catalog', help='SQLite catalog file, created if missing')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    p = commands.add_parser('sensors', help='import sensors from csv of name,ix,iy,ixmm,iymm')
+    p.add_argument('csv')
+    p = commands.add_parser('lenses', help='import lenses from csv of name,focal_mm[,max_focal_mm[,k1,k2,k3,p1,p2]]')
+    p.add_argument('csv')
+    p = commands.add_parser('rank', help='rank every sensor and lens combination')
+    p.add_argument('--template', nargs=2, metavar=('FILE','LABEL'), help='geoCamera xml file and label of the configuration to start from')
+    p.add_argument('--height', type=float)
+    p.add_argument('--pan', type=float)
+    p.add_argument('--range', type=float)
+    p.add_argument('--resolution', type=float)
+    p.add_argument('--roll', type=float)
+    p.add_argument('--tilt', type=float, nargs=2, default=(-20.0,0.0), metavar=('MIN','MAX'))
+    p.add_argument('--tilt-step', type=float, default=1.0)
+    p.add_argument('--min-focal', type=float)
+    p.add_argument('--max-focal', type=float)
+    p.add_argument('--min-rows', type=int)
+    p.add_argument('-n', '--count', type=int, default=20)
+    p.add_argument('-o', '--output', help='geoCamera xml file to write the shortlist to')
+    args = parser.parse_args()
+
+    db = openCatalog(args.catalog)
+    if args.command == 'sensors':
+        with open(args.csv) as infile:
+            print('imported {} sensors'.format(importSensors(db, infile)))
+    elif args.command == 'lenses':
+        with open(args.csv) as infile:
+            print('imported {} lenses'.format(importLenses(db, infile)))
+    else:
+        if args.template is not None:
+            template = geoCamEngine.findConfiguration(*args.template).values
+        else:
+            template = Configuration().values
+        for key, value in (('height',args.height),('pan_angle',args.pan),('range',args.range),
+                           ('resolution',args.resolution),('roll_range',args.roll)):
+            if value is not None:
+                template[key] = value
+        tilts = numpy.arange(args.tilt[0], args.tilt[1]+args.tilt_step/2.0, args.tilt_step)
+        shortlist = rank(combinations(db, args.min_focal, args.max_focal, args.min_rows), template, tilts, args.count)
+        print('area (m^2)\tmax range (m)\ttilt\thfov\tlabel')
+        for label, config, area, max_range in shortlist:
+            hfov = math.degrees(2.0*math.atan(config.values['ix']/(2.0*config.values['fx'])))
+            print('{:.0f}\t{:.1f}\t{:.1f}\t{:.1f}\t{}'.format(area, max_range, config.values['tilt_angle'], hfov, label))
+        if args.output is not None:
+            geoCamEngine.writeConfigurations(args.output, [(label, config) for label, config, area, max_range in shortlist])
+    db.close()
@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+
+# Headless camera geometry used by the planner GUI and the command line tools.
+
+import collections
+import hashlib
+import math
+import numpy
+import os
+import tempfile
+import xml.etree.ElementTree
+import xml.sax.saxutils
+import geoCamKernel
+
+class Configuration:
+    defaults = (('fx',1280.0),
+                ('fy',1280.0),
+                ('ix',2560),
+                ('iy',1920),
+                ('ixmm',5.76),
+                ('iymm',4.29),
+                ('max_zoom',1.0),
+                ('range',1000.0),
+                ('height',30.0),
+                ('pan_angle',90.0),
+                ('tilt_angle',-5.0),
+                ('resolution',1.0),
+                ('roll_range',1.5),
+                ('k1',0.0),
+                ('k2',0.0),
+                ('k3',0.0),
+                ('p1',0.0),
+                ('p2',0.0)
+               )
+    ints = ('ix','iy')
+    # Brown-Conrady radial (k) and tangential (p) distortion coefficients
+    lens = ('k1','k2','k3','p1','p2')
+
+    def __init__(self, copyFrom = None):
+        self.values = {}
+        self.description = ''
+        if copyFrom is None:
+            for d in Configuration.defaults:
+                self.values[d[0]]=d[1]
+        else:
+            self.description = copyFrom.description
+            for d in Configuration.defaults:
+                self.values[d[0]] = copyFrom.values[d[0]]
+
+    def saveTo(self,outfile,label):
+        outfile.write('    <Configuration')
+        outfile.write(' label='+xml.sax.saxutils.quoteattr(label))
+        for v in Configuration.defaults:
+            value = self.values[v[0]]
+            value = int(value) if v[0] in Configuration.ints else float(value)
+            outfile.write(' '+v[0]+'="'+str(value)+'"')
+        outfile.write('>'+xml.sax.saxutils.escape(self.description, {'\r':'&#13;'})+'</Configuration>\n')
+
+    def loadFrom(self, node):
+        for v in Configuration.defaults:
+            try:
+                if v[0] in Configuration.ints:
+                    self.values[v[0]] = int(node.attrib[v[0]])
+                else:
+                    self.values[v[0]] = float(node.attrib[v[0]])
+            except KeyError:
+                self.values[v[0]] = v[1]
+
+        if node.text is not None:
+            self.description = node.text
+        else:
+            self.description = ''
+
+
+def loadConfigurations(fname):
+    configs = []
+    tree = xml.etree.ElementTree.parse(fname)
+    for c in tree.getroot().findall('Configuration'):
+        config = Configuration()
+        config.loadFrom(c)
+        configs.append((c.attrib['label'],config))
+    return configs
+
+def configurationKey(config):
+    # identifies what a configuration holds, for telling which entries of a
+    # reloaded file or project changed. Stable between runs.
+    return hashlib.sha1(repr((tuple(config.values[d[0]] for d in Configuration.defaults), config.description)).encode('utf-8')).hexdigest()
+
+def diffConfigurations(keys, configs):
+    # Compares configs, a list of (label, Configuration), with keys, the
+    # configurationKey of each label as last seen. Returns the labels added,
+    # removed and changed, and the keys of configs.
+    newKeys = collections.OrderedDict((label, configurationKey(config)) for label, config in configs)
+    return diffKeys(keys, newKeys)+(newKeys,)
+
+def diffKeys(keys, newKeys):
+    # labels added, removed and changed going from keys to newKeys, both
+    # {label: configurationKey}
+    added = [label for label in newKeys if label not in keys]
+    removed = [label for label in keys if label not in newKeys]
+    changed = [label for label in newKeys if label in keys and keys[label] != newKeys[label]]
+    return added, removed, changed
+
+def saveConfigurations(outfile, configs):
+    # outfile is expected to encode utf-8
+    outfile.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    outfile.write('<geoCamera>\n')
+    for label, config in configs:
+        config.saveTo(outfile, label)
+    outfile.write('</geoCamera>\n')
+
+def writeConfigurations(fname, configs):
+    # Writes a geoCamera file through a temporary file in the same directory
+    # so readers never see it half written. Whatever fails, interrupts
+    # included, the temporary file is closed and removed.
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fname)), suffix='.tmp')
+    replaced = False
+    try:
+        try:
+            outfile = os.fdopen(fd, 'w', encoding='utf-8')
+        except BaseException:
+            os.close(fd)
+            raise
+        with outfile:
+            saveConfigurations(outfile, configs)
+        # mkstemp files are private, keep the permissions of the file replaced
+        # or give the usual ones to a new file
+        try:
+            mode = os.stat(fname).st_mode & 0o7777
+        except OSError:
+            mask = os.umask(0)
+            os.umask(mask)
+            mode = 0o666 & ~mask
+        os.chmod(temp, mode)
+        os.replace(temp, fname)
+        replaced = True
+    finally:
+        if not replaced:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+def findConfiguration(fname, label):
+    for l, c in loadConfigurations(fname):
+        if l == label:
+            return c
+    raise KeyError('no configuration labeled '+label+' in '+fname)
+
+
+def zoomLevels(values):
+    zooms = [1.0]
+    if values['max_zoom'] > 1.0:
+        zooms.append(values['max_zoom'])
+    return zooms
+
+def undistort(xd, yd, k1, k2, k3, p1, p2, iterations=20):
+    # Undistorted normalized image coordinates of distorted ones, by fixed
+    # point iteration of the Brown-Conrady model.
+    x = xd
+    y = yd
+    for i in range(iterations):
+        r2 = x*x+y*y
+        radial = 1.0+r2*(k1+r2*(k2+r2*k3))
+        x = (xd-(2.0*p1*x*y+p2*(r2+2.0*x*x)))/radial
+        y = (yd-(p1*(r2+2.0*y*y)+2.0*p2*x*y))/radial
+    return x, y
+
+
+def elevationAngles(v, iy, fy, coefficients):
+    # Elevation of image rows v along the centre column. fy and the
+    # distortion coefficients may be arrays broadcasting against v.
+    if not any(numpy.any(c) for c in coefficients):
+        return numpy.arctan2(v-iy/2.0,fy)
+    x, y = undistort(numpy.zeros_like(v), (v-iy/2.0)/fy, *coefficients)
+    return numpy.arctan2(y, numpy.hypot(1.0,x))
+
+def azimuthAngles(u, ix, fx, coefficients):
+    if not any(numpy.any(c) for c in coefficients):
+        return numpy.arctan2(u-ix/2.0,fx)
+    x, y = undistort((u-ix/2.0)/fx, numpy.zeros_like(u), *coefficients)
+    return numpy.arctan2(x, 1.0)
+
+
+class RayTable:
+    # Ray angles of the pixel edges of one sensor, lens and zoom: rows holds
+    # the elevation of each row edge along the centre column and columnAngles
+    # the azimuth of column positions along the centre row. The same
+    # distortion coefficients are used at every zoom.
+    def __init__(self, values, z):
+        self.ix = values['ix']
+        self.iy = values['iy']
+        self.fx = values['fx']*z
+        self.fy = values['fy']*z
+        self.coefficients = tuple(float(values[k]) for k in Configuration.lens)
+        self.distorted = any(self.coefficients)
+        self.columns = {}
+        self.edges = None
+        self.rows = self.elevation(numpy.arange(self.iy+1, dtype=float))
+        self.left, self.right = self.azimuth(numpy.array((0.0,float(self.ix))))
+
+    def elevation(self, v):
+        return elevationAngles(v, self.iy, self.fy, self.coefficients)
+
+    def azimuth(self, u):
+        return azimuthAngles(u, self.ix, self.fx, self.coefficients)
+
+    def columnAngles(self, columns):
+        if columns not in self.columns:
+            self.columns[columns] = self.azimuth(numpy.arange(columns)*(self.ix/float(columns)))
+        return self.columns[columns]
+
+    def columnEdges(self):
+        # azimuth of every column edge, 0 to ix
+        if self.edges is None:
+            self.edges = self.azimuth(numpy.arange(self.ix+1, dtype=float))
+        return self.edges
+
+
+ray_tables = collections.OrderedDict()
+ray_table_size = 64
+
+def rayTable(values, z):
+    # Cached RayTable, only rebuilt when the sensor, lens or zoom change.
+    key = (values['ix'],values['iy'],values['fx']*z,values['fy']*z)+tuple(values[k] for k in Configuration.lens)
+    table = ray_tables.get(key)
+    if table is None:
+        table = RayTable(values, z)
+        ray_tables[key] = table
+        if len(ray_tables) > ray_table_size:
+            ray_tables.popitem(last=False)
+    else:
+        ray_tables.move_to_end(key)
+    return table
+
+def panFactor(values, z):
+    return stagePan(values, z, rayTable(values, z))
+
+def sensorAngles(values, z):
+    return rayTable(values, z).rows
+
+def sensorAnglesX(values, z, columns=100):
+    return rayTable(values, z).columnAngles(columns)
+
+kernels = ('numpy','numba')
+kernel = 'numpy'
+
+def setKernel(name):
+    # Selects how Footprint is computed: 'numpy' is the reference path,
+    # 'numba' the fused kernel in geoCamKernel.
+    global kernel
+    if name not in kernels:
+        raise ValueError('unknown kernel '+name+', expected one of '+', '.join(kernels))
+    if name == 'numba' and not geoCamKernel.available:
+        raise RuntimeError('numba is not installed')
+    kernel = name
+
+def checkKernel(values, columns=100, rowStep=1):
+    # Names of the Footprint results where the fused kernel differs from the
+    # numpy path, empty when they match.
+    global kernel
+    previous = kernel
+    mismatches = []
+    try:
+        for z in zoomLevels(values):
+            kernel = 'numpy'
+            reference = Footprint(values, z, columns, rowStep)
+            kernel = 'numba'
+            fused = Footprint(values, z, columns, rowStep)
+            # rows within rounding of the resolution may go either way
+            boundary = numpy.isclose(reference.y, values['resolution'], rtol=1e-9)
+            for name in ('near_range','far_range','range','x','y','ok','top_x_ok','top_y_ok','top_x_notOk','top_y_notOk'):
+                a = getattr(reference, name)
+                b = getattr(fused, name)
+                if name == 'ok':
+                    same = a.shape == b.shape and (a[~boundary] == b[~boundary]).all()
+                else:
+                    same = a.shape == b.shape and numpy.allclose(a, b, rtol=1e-9, atol=1e-9)
+                if not same and name not in mismatches:
+                    mismatches.append(name)
+    finally:
+        kernel = previous
+    return mismatches
+
+
+def stageRays(values, z):
+    return rayTable(values, z)
+
+def stagePan(values, z, table):
+    hfovx = max(-table.left, table.right)
+    pan_factor = math.radians(abs(90.0 - values['pan_angle']))
+    if(pan_factor < hfovx):
+        pan_factor = 0.0
+    else:
+        pan_factor = pan_factor - hfovx
+    return math.cos(pan_factor)
+
+def stageAngles(values, z, table):
+    # Row ray angles relative to the horizon, with the rows only seen when the
+    # ship rolls down (before) or up (after) appended to the nominal rows.
+    sensor_angles = table.rows
+    rr = math.radians(values['roll_range'])
+    offsets = sensor_angles-sensor_angles[0]
+    start_angle = math.radians(values['tilt_angle'])+sensor_angles[0]
+    end_angle = start_angle + offsets[-1]
+    angles = numpy.concatenate((start_angle-rr+offsets[sensor_angles-rr < sensor_angles[0]],
+                                start_angle+offsets,
+                                start_angle+rr+offsets[sensor_angles+rr > sensor_angles[-1]]))
+    return angles, start_angle, end_angle
+
+def stageRanges(values, z, angles):
+    # near, far and middle range and footprint of every visible row pair
+    angles = angles[0]
+    near = angles[:-1]
+    far = angles[1:]
+    visible = far < 0.0
+    rn = -values['height']/numpy.tan(near[visible])
+    rf = -values['height']/numpy.tan(far[visible])
+    return rn, rf, rn+((rf-rn)/2.0), rf-rn
+
+def stageClassify(values, z, ranges):
+    ok = ranges[3] <= values['resolution']
+    return ok, ~ok
+
+def stageTop(values, z, table, ranges, classify):
+    b = table.columnAngles(values['columns']) + math.radians(values['pan_angle'])
+    rowStep = values['rowStep']
+    rm = ranges[2][::rowStep,numpy.newaxis]
+    ok = classify[0][::rowStep]
+    top_x = numpy.sin(b)*rm
+    top_y = numpy.cos(b)*rm
+    return top_x[ok].ravel(), top_y[ok].ravel(), top_x[~ok].ravel(), top_y[~ok].ravel()
+
+
+class Pipeline:
+    # The numpy footprint computation split into stages, each declaring the
+    # configuration values and the upstream stages it depends on. Results
+    # are kept per stage and zoom level, and a stage is only recomputed when
+    # one of its values or upstream stages changed, so for example a new
+    # resolution only reclassifies the rows and a new pan angle only
+    # reprojects the top-down view. columns and rowStep are passed along
+    # with the values.
+    stages = {'rays':(('ix','iy','fx','fy')+Configuration.lens, (), stageRays),
+              'pan':(('pan_angle',), ('rays',), stagePan),
+              'angles':(('tilt_angle','roll_range'), ('rays',), stageAngles),
+              'ranges':(('height',), ('angles',), stageRanges),
+              'classify':(('resolution',), ('ranges',), stageClassify),
+              'top':(('pan_angle','columns','rowStep'), ('rays','ranges','classify'), stageTop)
+             }
+
+    def __init__(self):
+        self.results = {}
+        self.computations = collections.Counter()
+
+    def evaluate(self, name, values, z):
+        # Returns (key, result), key identifying the inputs the result was
+        # computed from.
+        parameters, inputs, compute = Pipeline.stages[name]
+        upstream = [self.evaluate(i, values, z) for i in inputs]
+        key = (tuple(values[p] for p in parameters),)+tuple(u[0] for u in upstream)
+        cached = self.results.get((name,z))
+        if cached is None or cached[0] != key:
+            cached = (key, compute(values, z, *[u[1] for u in upstream]))
+            self.results[(name,z)] = cached
+            self.computations[name] += 1
+        return cached
+
+    def clear(self):
+        self.results = {}
+
+    def retain(self, zooms):
+        # drops the results of zoom levels other than zooms
+        self.results = dict((k, r) for k, r in self.results.items() if k[1] in zooms)
+
+
+class Footprint:
+    # Pixel footprint against range for one zoom level, plus the top-down
+    # projection of every row. rowStep and columns thin out the top-down
+    # points only, the footprint itself is always computed for every row.
+    # Passing the same Pipeline to successive Footprints reuses the stages
+    # that did not change.
+    def __init__(self, values, z, columns=100, rowStep=1, pipeline=None):
+        self.zoom = z
+        self.roll = math.radians(values['roll_range'])
+        if kernel == 'numba':
+            self.pan_factor = panFactor(values, z)
+            sensor_angles = sensorAngles(values, z)
+            self.start_angle = math.radians(values['tilt_angle'])+sensor_angles[0]
+            self.end_angle = self.start_angle+(sensor_angles[-1]-sensor_angles[0])
+            (self.near_range, self.far_range, self.range, self.x, self.y, self.ok,
+             self.top_x_ok, self.top_y_ok, self.top_x_notOk, self.top_y_notOk) = geoCamKernel.footprint(values, sensor_angles, sensorAnglesX(values, z, columns), self.pan_factor, rowStep)
+            self.notOk = ~self.ok
+            self.max_y = self.y.max() if len(self.y) else None
+            self.stages = None
+            return
+
+        if pipeline is None:
+            pipeline = Pipeline()
+        values = dict(values, columns=columns, rowStep=rowStep)
+        # the key of each stage result, telling callers which parts changed
+        # since an earlier Footprint from the same pipeline
+        self.stages = {}
+        def get(name):
+            self.stages[name], result = pipeline.evaluate(name, values, z)
+            return result
+        self.pan_factor = get('pan')
+        angles, self.start_angle, self.end_angle = get('angles')
+        self.near_range, self.far_range, self.range, self.y = get('ranges')
+        self.ok, self.notOk = get('classify')
+        self.top_x_ok, self.top_y_ok, self.top_x_notOk, self.top_y_notOk = get('top')
+        self.x = self.range*self.pan_factor
+        if len(self.y):
+            self.max_y = self.y.max()
+        else:
+            self.max_y = None
+
+
+class GroundLookup:
+    # Inverse of the footprint geometry: which pixel sees points on the sea
+    # surface given relative to the ship as in the top-down view (x across
+    # track, y along track towards the bow), and at what footprint. The
+    # range and azimuth of every row and column edge are interpolated, so
+    # each query is a handful of vectorized operations.
+    def __init__(self, values, z=1.0):
+        table = rayTable(values, z)
+        self.height = values['height']
+        self.resolution = values['resolution']
+        self.pan = math.radians(values['pan_angle'])
+        self.tilt = math.radians(values['tilt_angle'])
+        self.roll = math.radians(values['roll_range'])
+        self.sensor_angles = table.rows
+        # the row edges below the horizon are a prefix since the angles increase
+        visible = numpy.flatnonzero(self.tilt+table.rows < 0.0)
+        self.ranges = -self.height/numpy.tan(self.tilt+table.rows[visible])
+        self.rows = visible.astype(float)
+        self.footprints = numpy.diff(self.ranges)
+        self.azimuths = table.columnEdges()
+        self.columns = numpy.arange(len(self.azimuths), dtype=float)
+
+    def query(self, x, y):
+        # Returns fractional column and row (row 0 being the lowest ray, as in
+        # sensorAngles), range, footprint and whether the point is seen at the
+        # nominal attitude and at every roll within roll_range. Points that
+        # are not seen get nan pixel coordinates and footprint.
+        x = numpy.asarray(x, dtype=float)
+        y = numpy.asarray(y, dtype=float)
+        r = numpy.hypot(x, y)
+        bearing = numpy.remainder(numpy.arctan2(x, y)-self.pan+math.pi, 2.0*math.pi)-math.pi
+        column = numpy.interp(bearing, self.azimuths, self.columns, left=numpy.nan, right=numpy.nan)
+        if len(self.ranges) > 1:
+            row = numpy.interp(r, self.ranges, self.rows, left=numpy.nan, right=numpy.nan)
+        else:
+            row = numpy.full(r.shape, numpy.nan)
+        visible = ~(numpy.isnan(row) | numpy.isnan(column))
+        row[~visible] = numpy.nan
+        column[~visible] = numpy.nan
+        footprint = numpy.full(r.shape, numpy.nan)
+        if len(self.footprints):
+            pixel = numpy.minimum(row[visible].astype(int), len(self.footprints)-1)
+            footprint[visible] = self.footprints[pixel]
+        s = -numpy.arctan2(self.height, r)-self.tilt
+        always = ~numpy.isnan(column) & (s-self.roll >= self.sensor_angles[0]) & (s+self.roll <= self.sensor_angles[-1])
+        return column, row, r, footprint, visible, always
+
+
+def envelopePolygons(height, low, high, range_max):
+    # Exact vertical envelopes between the lines of slope low and high (dy/dx)
+    # through the camera at height, clipped to the water and to range_max, as
+    # polygon vertices (..., 4, 2) of range and height. Inputs broadcast.
+    # Vertices repeat where the clipping cuts a corner off, and an envelope
+    # whose high slope isn't above its low one collapses onto the camera.
+    height, low, high, range_max = numpy.broadcast_arrays(*[numpy.asarray(a, dtype=float) for a in (height, low, high, range_max)])
+    with numpy.errstate(divide='ignore'):
+        # ranges where the lines reach the water, inf if they never do
+        xl = numpy.where(low < 0.0, -height/numpy.minimum(low, 0.0), numpy.inf)
+        xu = numpy.where(high < 0.0, -height/numpy.minimum(high, 0.0), numpy.inf)
+    empty = high <= low
+    x1 = numpy.where(empty, 0.0, numpy.minimum(xu, range_max))
+    x3 = numpy.minimum(xl, x1)
+    zero = numpy.zeros(height.shape)
+    y1 = numpy.where(xu <= range_max, 0.0, numpy.maximum(0.0, height+x1*high))
+    y2 = numpy.where(xl <= x1, 0.0, numpy.maximum(0.0, height+x1*low))
+    y1 = numpy.where(empty, height, y1)
+    y2 = numpy.where(empty, height, y2)
+    y3 = numpy.where(empty, height, numpy.where(xl <= x1, 0.0, y2))
+    return numpy.stack((numpy.stack((zero, height), axis=-1),
+                        numpy.stack((x1, y1), axis=-1),
+                        numpy.stack((x1, y2), axis=-1),
+                        numpy.stack((x3, y3), axis=-1)), axis=-2)
+
+def rayLimits(start_angle, end_angle):
+    # the ray angles limited to straight down and straight up so their
+    # slopes keep pointing away from the ship
+    return numpy.clip(start_angle, -math.pi/2.0, math.pi/2.0), numpy.clip(end_angle, -math.pi/2.0, math.pi/2.0)
+
+def verticalEnvelopes(values, fp):
+    # Always visible and sometimes visible vertical envelopes of a Footprint
+    # as polygons (4, 2). sometimes is None without roll.
+    h = values['height']
+    sometimes = None
+    if fp.roll > 0.0:
+        low, high = rayLimits(fp.start_angle-fp.roll, fp.end_angle+fp.roll)
+        sometimes = envelopePolygons(h, numpy.tan(low)/fp.pan_factor, numpy.tan(high)/fp.pan_factor, values['range'])
+    low, high = rayLimits(fp.start_angle+fp.roll, fp.end_angle-fp.roll)
+    always = envelopePolygons(h, numpy.tan(low), numpy.tan(high), values['range'])
+    return always, sometimes
+
+
+class FootprintBatch:
+    # Footprints of several configurations at the same zoom factor computed
+    # together. Each configuration is a row, padded with nan past its last
+    # visible row pair so that configurations with different imager sizes
+    # can share the arrays. errors, {field: array of offsets}, turns a single
+    # configuration into one per offset without a dict for each. Perturbed
+    # focal lengths and distortion are evaluated for all offsets at once,
+    # leaving the rayTable cache alone.
+    def __init__(self, valuesList, z=1.0, errors=None):
+        if errors:
+            if any(k in errors for k in Configuration.ints):
+                raise ValueError('integer fields cannot be perturbed')
+            count = len(next(iter(errors.values())))
+        else:
+            count = len(valuesList)
+
+        def column(key):
+            c = numpy.array([float(v[key]) for v in valuesList])[:,numpy.newaxis]
+            if errors:
+                c = numpy.broadcast_to(c+numpy.asarray(errors.get(key, 0.0), dtype=float).reshape((-1,1)), (count,1))
+            return c
+
+        self.zoom = z
+        self.height = column('height')
+        self.range_max = column('range')
+        self.resolution = column('resolution')
+        self.roll = numpy.radians(column('roll_range'))
+        if errors and any(k in errors for k in ('fx','fy')+Configuration.lens):
+            values = valuesList[0]
+            coefficients = [column(k) for k in Configuration.lens]
+            iy = numpy.full((count,1), float(values['iy']))
+            sensor_angles = elevationAngles(numpy.arange(values['iy']+1, dtype=float), values['iy'], column('fy')*z, coefficients)
+            sides = azimuthAngles(numpy.array((0.0,float(values['ix']))), values['ix'], column('fx')*z, coefficients)
+            left = sides[:,:1]
+            right = sides[:,1:]
+        else:
+            tables = [rayTable(valuesList[0], z)]*count if errors else [rayTable(v, z) for v in valuesList]
+            iy = numpy.array([float(t.iy) for t in tables])[:,numpy.newaxis]
+            left = numpy.array([t.left for t in tables])[:,numpy.newaxis]
+            right = numpy.array([t.right for t in tables])[:,numpy.newaxis]
+            # configurations sharing a sensor and lens share their RayTable
+            sensor_angles = numpy.full((len(tables),int(iy.max())+1), numpy.nan)
+            shared = {}
+            for n, t in enumerate(tables):
+                shared.setdefault(id(t),(t,[]))[1].append(n)
+            for t, n in shared.values():
+                sensor_angles[n,:t.iy+1] = t.rows
+        hfovx = numpy.maximum(-left,right)
+        pan_factor = numpy.radians(numpy.abs(90.0-column('pan_angle')))
+        self.pan_factor = numpy.cos(numpy.where(pan_factor < hfovx, 0.0, pan_factor-hfovx))
+        self.azimuth = numpy.radians(column('pan_angle'))+numpy.hstack((left,right))
+
+        first = sensor_angles[:,:1]
+        last = numpy.take_along_axis(sensor_angles, iy.astype(int), axis=1)
+        offsets = sensor_angles-first
+        rr = self.roll
+        self.start_angle = numpy.radians(column('tilt_angle'))+first
+        self.end_angle = self.start_angle+(last-first)
+
+        with numpy.errstate(invalid='ignore'):
+            # the three blocks are each increasing and follow each other, so
+            # sorting only pushes the nan padding to the end of each row
+            angles = numpy.concatenate((numpy.where(sensor_angles-rr < first, self.start_angle-rr+offsets, numpy.nan),
+                                        self.start_angle+offsets,
+                                        numpy.where(sensor_angles+rr > last, self.start_angle+rr+offsets, numpy.nan)), axis=1)
+            angles.sort(axis=1)
+            near = angles[:,:-1]
+            far = angles[:,1:]
+            self.visible = far < 0.0
+            columns = max(1,self.visible.sum(axis=1).max())
+            self.visible = self.visible[:,:columns]
+            near = numpy.where(self.visible, near[:,:columns], numpy.nan)
+            far = numpy.where(self.visible, far[:,:columns], numpy.nan)
+            rn = -self.height/numpy.tan(near)
+            rf = -self.height/numpy.tan(far)
+            self.near_range = rn
+            self.far_range = rf
+            self.range = rn+((rf-rn)/2.0)
+            self.x = self.range*self.pan_factor
+            self.y = rf-rn
+            self.ok = self.y <= self.resolution
+        self.notOk = self.visible & ~self.ok
+        self.count = self.visible.sum(axis=1)
+
+    def bands(self, mask):
+        # (configuration, first row, last row) of each run of rows in mask
+        padded = numpy.zeros((mask.shape[0],mask.shape[1]+2), dtype=numpy.int8)
+        padded[:,1:-1] = mask
+        edges = numpy.diff(padded, axis=1)
+        n, first = numpy.nonzero(edges == 1)
+        last = numpy.nonzero(edges == -1)[1]-1
+        return n, first, last
+
+    def covered(self, mask, ranges):
+        # (configuration, range) true where the ground at each of ranges falls
+        # in a band of rows in mask.
+        n, first, last = self.bands(mask)
+        ranges = numpy.asarray(ranges, dtype=float)
+        inside = (self.near_range[n,first][:,numpy.newaxis] <= ranges) & (ranges <= self.far_range[n,last][:,numpy.newaxis])
+        covered = numpy.zeros((self.visible.shape[0],len(ranges)), dtype=bool)
+        numpy.logical_or.at(covered, n, inside)
+        return covered
+
+    def usableArea(self):
+        # Ground area (m^2) within range where the footprint meets the
+        # resolution, and the farthest such range, of every configuration.
+        n, first, last = self.bands(self.ok)
+        near = numpy.maximum(self.near_range[n,first], 0.0)
+        far = numpy.minimum(self.far_range[n,last], self.range_max[n,0])
+        far = numpy.maximum(far, near)
+        width = self.azimuth[n,1]-self.azimuth[n,0]
+        area = numpy.zeros(self.visible.shape[0])
+        numpy.add.at(area, n, width*(far**2-near**2)/2.0)
+        max_range = numpy.zeros(self.visible.shape[0])
+        numpy.maximum.at(max_range, n, numpy.where(far > near, far, 0.0))
+        return area, max_range
+
+    def usableRings(self, values, columns, n=0):
+        # Rows of configuration n, whose values are values, that meet the
+        # resolution within range, with their near and far ranges clipped to
+        # it and the ground area of one of columns equal columns of each, and
+        # the azimuth (radians) of the columns.
+        rows = numpy.nonzero(self.ok[n])[0]
+        near = numpy.maximum(self.near_range[n,rows], 0.0)
+        far = numpy.minimum(self.far_range[n,rows], self.range_max[n,0])
+        keep = far > near
+        rows, near, far = rows[keep], near[keep], far[keep]
+        table = rayTable(values, self.zoom)
+        azimuth = table.columnAngles(columns)+math.radians(values['pan_angle'])
+        ring = (table.right-table.left)/columns*(far**2-near**2)/2.0
+        return rows, near, far, ring, azimuth
+
+    def topDownSectors(self, mask, arcPoints=16, clip=False):
+        # Top-down annular sectors covering each band of rows in mask, from
+        # the near edge of its first row to the far edge of its last, as
+        # polygon vertices (band, 2*arcPoints, 2), with the configuration,
+        # near and far range of each band. clip limits the bands to the
+        # range of their configuration.
+        n, first, last = self.bands(mask)
+        near = self.near_range[n,first]
+        far = self.far_range[n,last]
+        if clip:
+            far = numpy.minimum(far, self.range_max[n,0])
+            keep = near < far
+            n, near, far = n[keep], near[keep], far[keep]
+        t = numpy.linspace(0.0, 1.0, arcPoints)
+        b = self.azimuth[n,:1]+(self.azimuth[n,1:]-self.azimuth[n,:1])*t
+        b = numpy.hstack((b, b[:,::-1]))
+        r = numpy.hstack((numpy.repeat(far[:,numpy.newaxis],arcPoints,axis=1), numpy.repeat(near[:,numpy.newaxis],arcPoints,axis=1)))
+        return numpy.dstack((numpy.sin(b)*r, numpy.cos(b)*r)), n, near, far
+
+    def envelopes(self, range_max):
+        # Always visible vertical envelope of every configuration as polygon
+        # vertices (configuration, 4, 2).
+        low, high = rayLimits(self.start_angle+self.roll, self.end_angle-self.roll)
+        return envelopePolygons(self.height, numpy.tan(low), numpy.tan(high), range_max)[:,0]
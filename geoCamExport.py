@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+# Exports of the coverage of a configuration for use outside the planner.
+#
+# GeoJSON: the top-down bands of rows whose footprint meets (ok) or misses
+# the resolution are turned into polygons, placed at each ship position and
+# heading of a track and written feature by feature, so a whole voyage can
+# be exported without holding the feature collection in memory. Track files
+# are csv lines of time,latitude,longitude,heading (degrees, heading
+# clockwise from north); a header line is skipped.
+
+import argparse
+import csv
+import json
+import numpy
+import geoCamEngine
+
+earth_radius = 6371008.8
+
+def coverageBands(values, z=1.0, arcPoints=16):
+    # Local polygons of the ok and not ok bands within the configuration's
+    # range as (vertices, ok, near, far) with vertices (band, 2*arcPoints, 2)
+    # of x across and y along track.
+    batch = geoCamEngine.FootprintBatch([values], z)
+    bands = []
+    for ok, mask in ((True, batch.ok), (False, batch.notOk)):
+        verts, n, near, far = batch.topDownSectors(mask, arcPoints, clip=True)
+        # sectors run clockwise, GeoJSON wants counterclockwise outer rings
+        bands.append((verts[:,::-1], ok, near, far))
+    return bands
+
+def georeference(verts, latitude, longitude, heading):
+    # Longitude and latitude of local vertices (..., 2) for arrays of ship
+    # positions, on a local tangent plane around each position. Returns
+    # (position, ..., 2).
+    latitude = numpy.asarray(latitude, dtype=float).reshape((-1,)+(1,)*(verts.ndim-1))
+    longitude = numpy.asarray(longitude, dtype=float).reshape(latitude.shape)
+    h = numpy.radians(numpy.asarray(heading, dtype=float)).reshape(latitude.shape)
+    x = verts[...,0]
+    y = verts[...,1]
+    east = x*numpy.cos(h)+y*numpy.sin(h)
+    north = y*numpy.cos(h)-x*numpy.sin(h)
+    lat = latitude+numpy.degrees(north/earth_radius)
+    lon = longitude+numpy.degrees(east/(earth_radius*numpy.cos(numpy.radians(latitude))))
+    return numpy.stack((lon, lat), axis=-1)
+
+
+class GeoJSONWriter:
+    # Writes a FeatureCollection one feature at a time.
+    def __init__(self, outfile):
+        self.outfile = outfile
+        self.count = 0
+        self.outfile.write('{"type":"FeatureCollection","features":[\n')
+
+    def write(self, coordinates, properties):
+        ring = numpy.round(coordinates, 7).tolist()
+        ring.append(ring[0])
+        feature = {'type':'Feature',
+                   'geometry':{'type':'Polygon','coordinates':[ring]},
+                   'properties':properties}
+        if self.count:
+            self.outfile.write(',\n')
+        self.outfile.write(json.dumps(feature, separators=(',',':')))
+        self.count += 1
+
+    def close(self):
+        self.outfile.write('\n]}\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def readTrack(infile):
+    # Yields (time, latitude, longitude, heading) from a track csv.
+    for row in csv.reader(infile):
+        if not row or row[0].startswith('#'):
+            continue
+        try:
+            yield row[0].strip(), float(row[1]), float(row[2]), float(row[3])
+        except ValueError:
+            continue
+
+def exportGeoJSON(values, label, track, outfile, z=1.0, chunk=1000):
+    # Streams the georeferenced coverage bands for every position of track
+    # to outfile, georeferencing chunk positions at a time.
+    bands = coverageBands(values, z)
+    with GeoJSONWriter(outfile) as writer:
+        positions = []
+        for position in track:
+            positions.append(position)
+            if len(positions) == chunk:
+                writeChunk(writer, bands, positions, values, label, z)
+                positions = []
+        if positions:
+            writeChunk(writer, bands, positions, values, label, z)
+    return writer.count
+
+def writeChunk(writer, bands, positions, values, label, z):
+    times = [p[0] for p in positions]
+    latitude = [p[1] for p in positions]
+    longitude = [p[2] for p in positions]
+    heading = [p[3] for p in positions]
+    for verts, ok, near, far in bands:
+        if not len(verts):
+            continue
+        coordinates = georeference(verts, latitude, longitude, heading)
+        for i in range(len(positions)):
+            for b in range(len(verts)):
+                writer.write(coordinates[i,b], {'configuration':label,
+                                                'time':times[i],
+                                                'heading':heading[i],
+                                                'ok':ok,
+                                                'near_range':round(float(near[b]),2),
+                                                'far_range':round(float(far[b]),2),
+                                                'resolution':values['resolution'],
+                                                'zoom':z})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export georeferenced footprint coverage as GeoJSON.')
+    parser.add_argument('filename', help='geoCamera xml file')
+    parser.add_argument('label', help='label of the configuration')
+    parser.add_argument('track', help='csv of time,latitude,longitude,heading')
+    parser.add_argument('output', help='GeoJSON file to write')
+    parser.add_argument('-z', '--zoom', type=float, default=1.0)
+    args = parser.parse_args()
+
+    config = geoCamEngine.findConfiguration(args.filename, args.label)
+    with open(args.track) as infile, open(args.output, 'w') as outfile:
+        count = exportGeoJSON(config.values, args.label, readTrack(infile), outfile, args.zoom)
+    print('wrote {} features to {}'.format(count, args.output))
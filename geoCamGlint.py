@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+# Sun glint on the usable part of the footprint over a season. Water is
+# taken to glint where the view ray, mirrored in the sea surface, points
+# within the glint angle of the sun; the angle stands in for the spread of
+# wave slopes. For each ship heading the fraction of the area where the
+# footprint meets the resolution that glints is averaged over the daylight
+# times of the season.
+#
+# The sun's position only matters relative to the ship, so the daylight
+# sun positions of every time step are first binned by elevation and
+# azimuth. The glinting fraction is computed for all pixel bands at every
+# bin at once, and a heading then only rotates the azimuth bins.
+
+import argparse
+import math
+import numpy
+import geoCamEngine
+
+def sunPositions(times, latitude, longitude):
+    # Elevation and azimuth (degrees, azimuth clockwise from north) of the
+    # sun at numpy datetime64 UTC times, from the low precision formulas of
+    # the Astronomical Almanac (about 0.01 degree).
+    d = (times-numpy.datetime64('2000-01-01T12:00'))/numpy.timedelta64(1,'D')
+    g = numpy.radians(357.529+0.98560028*d)
+    q = 280.459+0.98564736*d
+    ecliptic = numpy.radians(q+1.915*numpy.sin(g)+0.020*numpy.sin(2*g))
+    obliquity = numpy.radians(23.439-0.00000036*d)
+    ra = numpy.arctan2(numpy.cos(obliquity)*numpy.sin(ecliptic), numpy.cos(ecliptic))
+    dec = numpy.arcsin(numpy.sin(obliquity)*numpy.sin(ecliptic))
+    gmst = 18.697374558+24.06570982441908*d
+    ha = numpy.radians(gmst*15.0+longitude)-ra
+    lat = math.radians(latitude)
+    elevation = numpy.arcsin(math.sin(lat)*numpy.sin(dec)+math.cos(lat)*numpy.cos(dec)*numpy.cos(ha))
+    azimuth = numpy.arctan2(-numpy.sin(ha), numpy.tan(dec)*math.cos(lat)-math.sin(lat)*numpy.cos(ha))
+    return numpy.degrees(elevation), numpy.degrees(azimuth)%360.0
+
+def pixelBands(values, columns=36, maxRows=200):
+    # Depression angle and azimuth from the bow (radians) and ground area of
+    # the usable pixel bands of a level ship, adjacent usable rows grouped
+    # into at most maxRows bands.
+    values = dict(values, roll_range=0.0)
+    batch = geoCamEngine.FootprintBatch([values])
+    rows, near, far, ring, b = batch.usableRings(values, columns)
+    if len(rows) == 0:
+        return numpy.zeros(0), numpy.zeros(0), numpy.zeros(0)
+    groups = numpy.array_split(numpy.arange(len(rows)), min(len(rows), maxRows))
+    area = numpy.array([ring[g].sum() for g in groups if len(g)])
+    rm = numpy.array([(near[g[0]]+far[g[-1]])/2.0 for g in groups if len(g)])
+    depression = numpy.arctan2(values['height'], rm)
+    depression = numpy.repeat(depression, columns)
+    azimuth = numpy.tile(b, len(rm))
+    area = numpy.repeat(area, columns)
+    return depression, azimuth, area
+
+def glintTable(depression, azimuth, area, glintAngle, binSize, needed=None):
+    # Fraction of area glinting with the sun at the centre of each elevation
+    # and relative azimuth bin, (elevation bins, azimuth bins). Only the
+    # elevation bins where needed is true are computed, the others are zero.
+    elevations = numpy.radians((numpy.arange(int(round(90.0/binSize)))+0.5)*binSize)
+    azimuths = numpy.radians((numpy.arange(int(round(360.0/binSize)))+0.5)*binSize)
+    limit = math.cos(math.radians(glintAngle))
+    weights = area/area.sum()
+    table = numpy.zeros((len(elevations),len(azimuths)))
+    if needed is None:
+        needed = numpy.ones(len(elevations), dtype=bool)
+    cos_d = numpy.cos(depression)
+    sin_d = numpy.sin(depression)
+    for i in numpy.nonzero(needed)[0]:
+        e = elevations[i]
+        # cosine of the angle between the mirrored view ray and the sun
+        c = (cos_d*math.cos(e))*numpy.cos(azimuth-azimuths[:,numpy.newaxis])+sin_d*math.sin(e)
+        table[i] = (c >= limit) @ weights
+    return table
+
+def glintLoss(values, elevation, azimuth, headings, glintAngle=10.0, columns=36, maxRows=200, binSize=1.0):
+    # Mean fraction of the usable area glinting at each of headings (degrees)
+    # over the daylight sun positions elevation and azimuth (degrees). Returns
+    # the fractions and the number of daylight positions.
+    day = elevation > 0.0
+    bins = (int(round(90.0/binSize)),int(round(360.0/binSize)))
+    hist = numpy.histogram2d(elevation[day], azimuth[day]%360.0, bins=bins, range=((0.0,90.0),(0.0,360.0)))[0]
+    count = int(day.sum())
+    depression, b, area = pixelBands(values, columns, maxRows)
+    if count == 0 or len(area) == 0 or area.sum() <= 0.0:
+        return numpy.zeros(len(headings)), count
+    # elevations the sun never reaches don't need their row of the table
+    table = glintTable(depression, b, area, glintAngle, binSize, hist.sum(axis=1) > 0)
+    loss = []
+    for h in headings:
+        # relative to the ship the sun is at its azimuth minus the heading
+        shift = int(round(h/binSize))
+        loss.append((hist*numpy.roll(table, shift, axis=1)).sum()/count)
+    return numpy.array(loss), count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fraction of usable coverage lost to sun glint per ship heading over a season.')
+    parser.add_argument('filename', help='geoCamera xml file')
+    parser.add_argument('label', help='label of the configuration')
+    parser.add_argument('--latitude', type=float, required=True)
+    parser.add_argument('--longitude', type=float, default=0.0)
+    parser.add_argument('--start', required=True, help='UTC date or time, for example 2026-06-01')
+    parser.add_argument('--end', required=True, help='UTC date or time')
+    parser.add_argument('--step', type=float, default=10.0, help='time step (minutes)')
+    parser.add_argument('--heading-step', type=float, default=10.0, help='degrees')
+    parser.add_argument('--glint-angle', type=float, default=10.0, help='degrees')
+    parser.add_argument('--pans', type=float, nargs='+', help='pan angles to compare, the configuration\'s if omitted')
+    args = parser.parse_args()
+
+    config = geoCamEngine.findConfiguration(args.filename, args.label)
+    times = numpy.arange(numpy.datetime64(args.start,'s'), numpy.datetime64(args.end,'s'), numpy.timedelta64(int(round(args.step*60)),'s'))
+    elevation, azimuth = sunPositions(times, args.latitude, args.longitude)
+    headings = numpy.arange(0.0, 360.0, args.heading_step)
+    pans = args.pans if args.pans else [config.values['pan_angle']]
+    losses = []
+    for p in pans:
+        loss, count = glintLoss(dict(config.values, pan_angle=p), elevation, azimuth, headings, args.glint_angle)
+        losses.append(loss)
+    print('{} of {} time steps in daylight'.format(count, len(times)))
+    print('heading\t'+'\t'.join('pan {:g}'.format(p) for p in pans))
+    for i, h in enumerate(headings):
+        print('{:g}\t'.format(h)+'\t'.join('{:.1%}'.format(l[i]) for l in losses))
+    print('mean\t'+'\t'.join('{:.1%}'.format(l.mean()) for l in losses))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# Fused footprint kernel, compiled with numba when it is installed. It walks
+# the row ray angles once, computing ranges, footprints, the resolution mask
+# and the top-down points as it goes instead of building the intermediate
+# arrays of the numpy path in geoCamEngine.Footprint. geoCamEngine.setKernel
+# switches between the two and geoCamEngine.checkKernel compares them.
+
+import math
+import numpy
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+available = numba is not None
+
+def _footprintKernel(sensor_angles, sensor_angles_x, tilt, roll, height, resolution, pan, pan_factor, rowStep):
+    first = sensor_angles[0]
+    last = sensor_angles[-1]
+    start_angle = tilt+first
+
+    # The ground range of every row edge below the horizon, rows only seen
+    # when rolling down first and when rolling up last. The angles only
+    # increase, so the walk stops at the first upward ray and the far range
+    # of one row pair is the near range of the next.
+    edges = numpy.empty(3*len(sensor_angles))
+    count = 0
+    done = False
+    for block in range(3):
+        for i in range(len(sensor_angles)):
+            sa = sensor_angles[i]
+            if block == 0:
+                if not sa-roll < first:
+                    break
+                a = start_angle-roll+(sa-first)
+            elif block == 1:
+                a = start_angle+(sa-first)
+            else:
+                if not sa+roll > last:
+                    continue
+                a = start_angle+roll+(sa-first)
+            if a >= 0.0:
+                done = True
+                break
+            edges[count] = -height/math.tan(a)
+            count += 1
+        if done:
+            break
+    rows = max(count-1, 0)
+
+    columns = len(sensor_angles_x)
+    sin_b = numpy.empty(columns)
+    cos_b = numpy.empty(columns)
+    for c in range(columns):
+        sin_b[c] = math.sin(sensor_angles_x[c]+pan)
+        cos_b[c] = math.cos(sensor_angles_x[c]+pan)
+
+    near = edges[:rows].copy()
+    far = edges[1:rows+1].copy()
+    rm = numpy.empty(rows)
+    x = numpy.empty(rows)
+    y = numpy.empty(rows)
+    ok = numpy.empty(rows, dtype=numpy.bool_)
+    # ok top-down points fill the buffers from the front, the others from the
+    # back
+    size = ((rows+rowStep-1)//rowStep)*columns
+    top_x = numpy.empty(size)
+    top_y = numpy.empty(size)
+    top_ok = 0
+    top_notOk = 0
+    for i in range(rows):
+        rn = near[i]
+        rf = far[i]
+        m = rn+((rf-rn)/2.0)
+        rm[i] = m
+        x[i] = m*pan_factor
+        y[i] = rf-rn
+        row_ok = rf-rn <= resolution
+        ok[i] = row_ok
+        # the branch stays outside the column loops so they vectorize
+        if i%rowStep == 0:
+            if row_ok:
+                for c in range(columns):
+                    top_x[top_ok+c] = sin_b[c]*m
+                    top_y[top_ok+c] = cos_b[c]*m
+                top_ok += columns
+            else:
+                end = size-top_notOk-1
+                for c in range(columns):
+                    top_x[end-c] = sin_b[c]*m
+                    top_y[end-c] = cos_b[c]*m
+                top_notOk += columns
+    return near, far, rm, x, y, ok, top_x, top_y, top_ok
+
+if available:
+    footprintKernel = numba.njit(cache=True)(_footprintKernel)
+else:
+    footprintKernel = _footprintKernel
+
+def footprint(values, sensor_angles, sensor_angles_x, pan_factor, rowStep=1):
+    # Returns near, far and middle range, x, y, ok and the ok and not ok
+    # top-down points of every visible row pair, in the same order as the
+    # numpy path. sensor_angles and sensor_angles_x come from
+    # geoCamEngine.RayTable.
+    near, far, rm, x, y, ok, top_x, top_y, top_ok = footprintKernel(sensor_angles, sensor_angles_x,
+                                                                    math.radians(values['tilt_angle']), math.radians(values['roll_range']),
+                                                                    float(values['height']), float(values['resolution']), math.radians(values['pan_angle']),
+                                                                    float(pan_factor), int(rowStep))
+    return near, far, rm, x, y, ok, top_x[:top_ok], top_y[:top_ok], top_x[top_ok:][::-1], top_y[top_ok:][::-1]
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import geoCamEngine
+
+    if len(sys.argv) == 2:
+        configs = geoCamEngine.loadConfigurations(sys.argv[1])
+    else:
+        configs = [('defaults',geoCamEngine.Configuration())]
+    if not available:
+        print('numba is not installed, only the numpy path is available')
+        sys.exit(1)
+    failed = False
+    for label, config in configs:
+        mismatches = geoCamEngine.checkKernel(config.values)
+        timings = []
+        for k in geoCamEngine.kernels:
+            geoCamEngine.setKernel(k)
+            start = time.perf_counter()
+            for i in range(20):
+                for z in geoCamEngine.zoomLevels(config.values):
+                    geoCamEngine.Footprint(config.values, z)
+            timings.append('{} {:.2f} ms'.format(k, (time.perf_counter()-start)*1000.0/20))
+        geoCamEngine.setKernel('numpy')
+        print(label+': '+(', '.join(mismatches)+' differ' if mismatches else 'match')+', '+', '.join(timings))
+        failed = failed or bool(mismatches)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+# Looks up which pixel of a configuration sees each ground point of a csv
+# file of "x,y" positions relative to the ship (x across track, y along
+# track towards the bow, in metres), writing column, row, range, footprint
+# and visibility for every point. Points are processed in chunks so files of
+# any size can be streamed.
+
+import argparse
+import itertools
+import sys
+import numpy
+import geoCamEngine
+
+def lookupFile(lookup, infile, outfile, chunk=1000000):
+    outfile.write('x,y,column,row,range,footprint,visible,always_visible,ok\n')
+    while True:
+        lines = list(itertools.islice(infile, chunk))
+        if not lines:
+            break
+        # skip blank lines, comments and a header
+        lines = [l for l in lines if l.strip() and l.lstrip()[0] in '+-.0123456789']
+        if not lines:
+            continue
+        points = numpy.loadtxt(lines, delimiter=',', ndmin=2, usecols=(0,1))
+        column, row, r, footprint, visible, always = lookup.query(points[:,0], points[:,1])
+        ok = visible & (footprint <= lookup.resolution)
+        numpy.savetxt(outfile, numpy.column_stack((points, column, row, r, footprint, visible, always, ok)),
+                      fmt=('%.3f','%.3f','%.2f','%.2f','%.3f','%.4f','%d','%d','%d'), delimiter=',')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Pixel and footprint seen at each ground point.')
+    parser.add_argument('filename', help='geoCamera xml file')
+    parser.add_argument('label', help='label of the configuration')
+    parser.add_argument('points', nargs='?', help='csv of x,y points, stdin if omitted')
+    parser.add_argument('-z', '--zoom', type=float, default=1.0)
+    args = parser.parse_args()
+
+    lookup = geoCamEngine.GroundLookup(geoCamEngine.findConfiguration(args.filename, args.label).values, args.zoom)
+    if args.points is None:
+        lookupFile(lookup, sys.stdin, sys.stdout)
+    else:
+        with open(args.points) as infile:
+            lookupFile(lookup, infile, sys.stdout)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# Monte Carlo analysis of mounting errors. Height, tilt, pan or any other
+# float parameter of a Configuration is perturbed by errors drawn from the
+# given distributions and, for each range, the fraction of perturbed
+# configurations whose pixel footprint at that range meets the resolution
+# is reported.
+
+import argparse
+import concurrent.futures
+import numpy
+import geoCamEngine
+
+distributions = ('normal','uniform')
+
+def parseErrors(specs):
+    # 'tilt_angle=normal:0.5' -> {'tilt_angle':('normal',0.5)}
+    fields = [d[0] for d in geoCamEngine.Configuration.defaults if d[0] not in geoCamEngine.Configuration.ints]
+    errors = {}
+    for spec in specs:
+        try:
+            key, dist = spec.split('=')
+            kind, width = dist.split(':')
+            width = float(width)
+        except ValueError:
+            raise ValueError('expected field=distribution:width, got '+spec)
+        if key not in fields:
+            raise ValueError('unknown or integer parameter '+key)
+        if kind not in distributions:
+            raise ValueError('unknown distribution '+kind+', expected one of '+', '.join(distributions))
+        errors[key] = (kind, width)
+    return errors
+
+def sampleErrors(errors, count, rng):
+    # normal widths are standard deviations, uniform widths are half ranges
+    samples = {}
+    for key, (kind, width) in errors.items():
+        if kind == 'normal':
+            samples[key] = rng.normal(0.0, width, count)
+        else:
+            samples[key] = rng.uniform(-width, width, count)
+    return samples
+
+def chunkCoverage(values, errors, ranges, count, seed, chunk):
+    # Number of perturbed configurations usable at each range.
+    rng = numpy.random.default_rng(seed)
+    usable = numpy.zeros(len(ranges), dtype=numpy.int64)
+    while count > 0:
+        n = min(chunk, count)
+        batch = geoCamEngine.FootprintBatch([values], errors=sampleErrors(errors, n, rng))
+        usable += batch.covered(batch.ok, ranges).sum(axis=0)
+        count -= n
+    return usable
+
+def usableProbability(values, errors, ranges, samples=10000, chunk=256, processes=1, seed=None):
+    # Returns the probability that the footprint meets resolution at each of
+    # ranges. With processes > 1 the samples are split between worker
+    # processes, each with its own independent random stream.
+    ranges = numpy.asarray(ranges, dtype=float)
+    seeds = numpy.random.SeedSequence(seed).spawn(max(1,processes))
+    counts = [samples//len(seeds)+(i < samples%len(seeds)) for i in range(len(seeds))]
+    if len(seeds) == 1:
+        usable = chunkCoverage(values, errors, ranges, counts[0], seeds[0], chunk)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(len(seeds)) as executor:
+            futures = [executor.submit(chunkCoverage, values, errors, ranges, c, s, chunk) for c, s in zip(counts, seeds)]
+            usable = sum(f.result() for f in futures)
+    return usable/float(samples)
+
+def nominalCoverage(values, ranges):
+    batch = geoCamEngine.FootprintBatch([values])
+    return batch.covered(batch.ok, ranges)[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Probability that the pixel footprint meets the resolution under mounting errors.')
+    parser.add_argument('filename', help='geoCamera xml file')
+    parser.add_argument('label', help='label of the configuration to analyse')
+    parser.add_argument('errors', nargs='+', help='field=distribution:width, for example height=normal:0.5 tilt_angle=uniform:1.0')
+    parser.add_argument('-n', '--samples', type=int, default=10000)
+    parser.add_argument('-s', '--step', type=float, default=10.0, help='range step (m)')
+    parser.add_argument('-p', '--processes', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    config = geoCamEngine.findConfiguration(args.filename, args.label)
+    errors = parseErrors(args.errors)
+    ranges = numpy.arange(0.0, config.values['range']+args.step/2.0, args.step)
+    probability = usableProbability(config.values, errors, ranges, args.samples, processes=args.processes, seed=args.seed)
+    nominal = nominalCoverage(config.values, ranges)
+    print('range (m)\tnominal\tprobability')
+    for r, n, p in zip(ranges, nominal, probability):
+        print('{:.1f}\t{}\t{:.4f}'.format(r, int(n), p))
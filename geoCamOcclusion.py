@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# Occlusion of the footprint by the ship itself. A ship file gives the deck
+# outline and obstacle boxes (superstructure, rails, masts) in ship
+# coordinates: x to starboard, y towards the bow and z up from the
+# waterline, in metres.
+#
+# <ship>
+#     <deck z="3.0">-5,-20 5,-20 5,15 0,25 -5,15</deck>
+#     <box label="bridge" x0="-4" y0="5" z0="3" x1="4" y1="10" z1="9"/>
+# </ship>
+#
+# Rays from a mount point to the ground seen by every row and column of a
+# configuration are cast against the deck and boxes, and the area within
+# range where the footprint meets the resolution is split into clear and
+# blocked. The ship is taken level, so the rows only seen when rolling are
+# left out. Candidate mount points and heights are evaluated in parallel.
+
+import argparse
+import concurrent.futures
+import numpy
+import matplotlib.path
+import xml.etree.ElementTree
+import geoCamEngine
+
+
+class Ship:
+    def __init__(self, deck=None, deck_height=0.0, boxes=()):
+        # deck is a sequence of (x, y) outline vertices, boxes a sequence of
+        # (label, (x0, y0, z0), (x1, y1, z1))
+        self.deck = None if deck is None else matplotlib.path.Path(deck, closed=True)
+        self.deck_height = deck_height
+        self.labels = [b[0] for b in boxes]
+        self.box_min = numpy.array([numpy.minimum(b[1],b[2]) for b in boxes], dtype=float).reshape((-1,3))
+        self.box_max = numpy.array([numpy.maximum(b[1],b[2]) for b in boxes], dtype=float).reshape((-1,3))
+
+    def blocked(self, origin, points):
+        # True for each of points (..., 3) whose segment from origin (3,) is
+        # blocked by the deck or a box.
+        origin = numpy.asarray(origin, dtype=float)
+        d = points-origin
+        blocked = numpy.zeros(d.shape[:-1], dtype=bool)
+        if self.deck is not None and origin[2] > self.deck_height:
+            # where the segment passes through the deck's plane, if it does
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                s = (self.deck_height-origin[2])/d[...,2]
+            crossing = (s > 0.0) & (s <= 1.0)
+            p = origin[:2]+s[crossing][:,numpy.newaxis]*d[crossing][:,:2]
+            blocked[crossing] = self.deck.contains_points(p)
+        if len(self.box_min):
+            # slab test of every segment against every box
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                t0 = (self.box_min-origin)/d[...,numpy.newaxis,:]
+                t1 = (self.box_max-origin)/d[...,numpy.newaxis,:]
+            # a segment parallel to a slab is inside it or misses the box
+            inside = (origin >= self.box_min) & (origin <= self.box_max)
+            t0 = numpy.where(numpy.isnan(t0), numpy.where(inside, -numpy.inf, numpy.inf), t0)
+            t1 = numpy.where(numpy.isnan(t1), numpy.where(inside, numpy.inf, -numpy.inf), t1)
+            enter = numpy.minimum(t0,t1).max(axis=-1)
+            leave = numpy.maximum(t0,t1).min(axis=-1)
+            hit = (enter <= leave) & (leave > 0.0) & (enter <= 1.0)
+            blocked |= hit.any(axis=-1)
+        return blocked
+
+
+def loadShip(fname):
+    root = xml.etree.ElementTree.parse(fname).getroot()
+    deck = None
+    deck_height = 0.0
+    node = root.find('deck')
+    if node is not None:
+        deck = [tuple(float(c) for c in p.split(',')) for p in node.text.split()]
+        deck_height = float(node.attrib.get('z', 0.0))
+    boxes = []
+    for node in root.findall('box'):
+        a = node.attrib
+        boxes.append((a.get('label',''),
+                      (float(a['x0']),float(a['y0']),float(a['z0'])),
+                      (float(a['x1']),float(a['y1']),float(a['z1']))))
+    return Ship(deck, deck_height, boxes)
+
+def clearCoverage(values, ship, x, y, height, columns=50, chunk=256):
+    # Area (m^2) within range where the footprint meets the resolution for a
+    # camera mounted at (x, y) and height above the waterline, as (clear,
+    # total).
+    values = dict(values, height=height, roll_range=0.0)
+    batch = geoCamEngine.FootprintBatch([values])
+    rows, near, far, ring, b = batch.usableRings(values, columns)
+
+    origin = numpy.array((x, y, height))
+    clear = 0.0
+    for i in range(0, len(rows), chunk):
+        rm = batch.range[0,rows[i:i+chunk]][:,numpy.newaxis]
+        points = numpy.stack((x+numpy.sin(b)*rm, y+numpy.cos(b)*rm, numpy.zeros(rm.shape[:1]+b.shape)), axis=-1)
+        seen = ~ship.blocked(origin, points)
+        # ring is the area of one column of a row
+        clear += (ring[i:i+chunk]*seen.sum(axis=1)).sum()
+    return clear, ring.sum()*columns
+
+def searchMounts(values, ship, mounts, heights, columns=50, processes=1):
+    # clearCoverage of every mount point (x, y) at every height, as a list of
+    # (x, y, height, clear, total), most clear coverage first.
+    candidates = [(x, y, h) for x, y in mounts for h in heights]
+    if processes > 1:
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            futures = [executor.submit(clearCoverage, values, ship, x, y, h, columns) for x, y, h in candidates]
+            coverage = [f.result() for f in futures]
+    else:
+        coverage = [clearCoverage(values, ship, x, y, h, columns) for x, y, h in candidates]
+    results = [c+a for c, a in zip(candidates, coverage)]
+    results.sort(key=lambda r: -r[3])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Footprint coverage left clear by the ship for candidate mount points.')
+    parser.add_argument('filename', help='geoCamera xml file')
+    parser.add_argument('label', help='label of the configuration')
+    parser.add_argument('ship', help='ship geometry xml file')
+    parser.add_argument('-m', '--mount', action='append', required=True, help='mount point x,y in ship coordinates, repeat for more')
+    parser.add_argument('--heights', type=float, nargs='+', help='camera heights above the waterline, the configuration height if omitted')
+    parser.add_argument('-c', '--columns', type=int, default=50)
+    parser.add_argument('-p', '--processes', type=int, default=1)
+    args = parser.parse_args()
+
+    config = geoCamEngine.findConfiguration(args.filename, args.label)
+    mounts = [tuple(float(c) for c in m.split(',')) for m in args.mount]
+    heights = args.heights if args.heights else [config.values['height']]
+    print('x\ty\theight\tclear (m^2)\ttotal (m^2)\tblocked')
+    for x, y, h, clear, total in searchMounts(config.values, loadShip(args.ship), mounts, heights, args.columns, args.processes):
+        print('{:.2f}\t{:.2f}\t{:.2f}\t{:.0f}\t{:.0f}\t{:.1%}'.format(x, y, h, clear, total, max(0.0,1.0-clear/total) if total else 0.0))
@@ -1,71 +1,166 @@
 #!/usr/bin/env python3
 
 import geoCamPlannerUI
+import geoCamCatalog
+import geoCamEngine
+import geoCamExport
+import geoCamKernel
+import geoCamMonteCarlo
+import geoCamProject
+import geoCamRender
+import geoCamTable
+from geoCamEngine import Configuration
 import wx
 import wxmpl
 import math
-import xml.etree.ElementTree
+import os
+import sqlite3
 import sys
 import matplotlib
 import matplotlib.pyplot
+import matplotlib.collections
+import numpy
+import xml.etree.ElementTree
+
+class PlotPanel(wxmpl.PlotPanel):
+    # A wxmpl panel whose figure is drawn by a geoCamRender.BackgroundRenderer.
+    # While a frame is being drawn the panel neither draws, resizes nor takes
+    # mouse input, so nothing else touches the figure, and the finished frame
+    # is painted from a bitmap until the panel next draws itself.
+    def __init__(self, parent, id):
+        wxmpl.PlotPanel.__init__(self, parent, id)
+        self.rendering = False
+        self.resized = False
+        self.frame = None
+        # bound after the canvas' own handlers, so these run first
+        self.Bind(wx.EVT_PAINT, self.OnPaintFrame)
+        self.Bind(wx.EVT_SIZE, self.OnSizeFrame)
+        self.Bind(wx.EVT_MOUSE_EVENTS, self.OnMouseFrame)
+
+    def render(self, renderer, done):
+        # done(error) is called on the GUI thread once the frame is shown
+        self.rendering = True
+        renderer.submit(self, lambda canvas, error: wx.CallAfter(self.OnRendered, done, error))
+
+    def OnRendered(self, done, error):
+        if not self:
+            # the window was destroyed while the frame was drawn
+            return
+        self.rendering = False
+        if error is None:
+            buffer = self.buffer_rgba()
+            width, height = self.get_renderer().get_canvas_width_height()
+            self.frame = wx.Bitmap.FromBufferRGBA(int(width), int(height), buffer)
+            self.Refresh()
+        if self.resized:
+            self.resized = False
+            self.SendSizeEvent()
+        done(error)
+
+    def draw(self, *args, **kwargs):
+        if self.rendering:
+            # the frame being drawn takes the place of this one
+            return
+        self.frame = None
+        wxmpl.PlotPanel.draw(self, *args, **kwargs)
+
+    def OnPaintFrame(self, evt):
+        if self.frame is None:
+            evt.Skip()
+            return
+        dc = wx.PaintDC(self)
+        dc.DrawBitmap(self.frame, 0, 0)
+
+    def OnSizeFrame(self, evt):
+        if self.rendering:
+            # resizing changes the figure, so it waits for the frame
+            self.resized = True
+            return
+        self.frame = None
+        evt.Skip()
+
+    def OnMouseFrame(self, evt):
+        # wxmpl zooms and moves its cursor by changing the figure
+        if not self.rendering:
+            evt.Skip()
 
-class Configuration:
-    defaults = (('fx',1280.0),
-                ('fy',1280.0),
-                ('ix',2560),
-                ('iy',1920),
-                ('ixmm',5.76),
-                ('iymm',4.29),
-                ('max_zoom',1.0),
-                ('range',1000.0),
-                ('height',30.0),
-                ('pan_angle',90.0),
-                ('tilt_angle',-5.0),
-                ('resolution',1.0),
-                ('roll_range',1.5)
-               )
-    ints = ('ix','iy')
-                                        
-    def __init__(self, copyFrom = None):
-        self.values = {}
-        self.description = ''
-        if copyFrom is None:
-            for d in Configuration.defaults:
-                self.values[d[0]]=d[1]
-        else:
-            self.description = copyFrom.description
-            for d in Configuration.defaults:
-                self.values[d[0]] = copyFrom.values[d[0]]
-
-    def saveTo(self,outfile,label):
-        outfile.write('    <Configuration')
-        outfile.write(' label="'+label+'"')
-        for v in Configuration.defaults:
-            outfile.write(' '+v[0]+'="'+str(self.values[v[0]])+'"')
-        outfile.write('>'+self.description+'</Configuration>\n')
-
-    def loadFrom(self, node):
-        for v in Configuration.defaults:
-            try:
-                if v[0] in Configuration.ints:
-                    self.values[v[0]] = int(node.attrib[v[0]])
-                else:
-                    self.values[v[0]] = float(node.attrib[v[0]])
-            except KeyError:
-                self.values[v[0]] = v[1]
-                    
-        if node.text is not None:
-            self.description = node.text
-        else:
-            self.description = ''
 
 class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
+    bright_green = (0.0,1.0,0.0,1.0)
+    bright_red = (1.0,0.0,0.0,1.0)
+    pale_green = (0.5,1.0,0.5,1.0)
+    pale_red = (1.0,0.5,0.5,1.0)
+
+    # value of one position of the live editing sliders, whose ranges are
+    # set in positions in the design
+    slider_steps = {'tilt_angle':0.1,
+                    'pan_angle':0.5,
+                    'height':0.1,
+                    'roll_range':0.1}
+
+    # groups of artists drawn for each zoom level
+    plot_groups = ('footprint','top','geometry')
+
+    # top-down points drawn per zoom level while a slider is dragged
+    live_columns = 20
+    live_rows = 100
+    # top-down points drawn per zoom level by full redraws. Agg holds the GIL
+    # while it draws an artist, so a few hundred thousand markers would stall
+    # the GUI thread despite the background renderer.
+    plot_columns = 50
+    plot_rows = 200
+    file_wildcard = 'geoCamera files (*.xml)|*.xml|Projects (*'+geoCamProject.extension+')|*'+geoCamProject.extension
+
     def __init__(self,fname=None):
-        
+
         geoCamPlannerUI.geoCamPlannerBase.__init__(self,None, -1, "")
         self.updating = False
-
-        self.plots = wxmpl.PlotPanel(self,-1)
+        self.livePending = False
+        self.liveDragging = False
+        self.liveBackground = None
+        self.liveArtists = []
+        # {zoom: {group: (key, artists)}} of the plots of the current
+        # configuration
+        self.dataArtists = {}
+        self.plotMode = None
+        self.compareConfigs = None
+        # full redraws are drawn off the GUI thread and the figure is left
+        # alone until the frame is shown, updates meanwhile are coalesced
+        self.renderer = geoCamRender.BackgroundRenderer()
+        self.renderPending = False
+        # separate stage caches so live previews at reduced density don't
+        # evict the full plots
+        self.pipeline = geoCamEngine.Pipeline()
+        self.livePipeline = geoCamEngine.Pipeline()
+        # the open file is polled and reloaded entry by entry when another
+        # program changes it
+        self.fileKeys = {}
+        self.fileStamp = None
+        # labels of the entries edited since the file was last read or
+        # written, entries of projects are only read once selected
+        self.dirty = set()
+        self.watchTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.OnWatchTimer, self.watchTimer)
+
+        self.compiledKernelMenuItem = self.geoCamPlannerFrame_menubar.compiledKernelMenuItem
+        self.compiledKernelMenuItem.Enable(geoCamKernel.available)
+
+        self.sliderTextCtrls = {'tilt_angle':self.tiltAngleTextCtrl,
+                                'pan_angle':self.panAngleTextCtrl,
+                                'height':self.heightTextCtrl,
+                                'roll_range':self.rollRangeTextCtrl}
+        self.liveSliders = {'tilt_angle':self.tiltSlider,
+                            'pan_angle':self.panSlider,
+                            'height':self.heightSlider,
+                            'roll_range':self.rollRangeSlider}
+
+        self.lensTextCtrls = {'k1':self.k1TextCtrl,
+                              'k2':self.k2TextCtrl,
+                              'k3':self.k3TextCtrl,
+                              'p1':self.p1TextCtrl,
+                              'p2':self.p2TextCtrl}
+
+        self.plots = PlotPanel(self,-1)
         self.footprint_axes = self.plots.get_figure().add_axes((0.1,0.5,0.8,0.3))
         self.geometry_axes = self.plots.get_figure().add_axes((0.1,0.1,0.8,0.3),sharex=self.footprint_axes)
         
@@ -84,32 +179,203 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
 
     def clear(self):
         self.filename = None
+        self.watch(None)
+        self.dirty = set()
         self.configComboBox.Clear()
         self.setCurrentConfig(None)
 
     def open(self, fname):
-        tree = xml.etree.ElementTree.parse(fname)
-        root = tree.getroot()
-        configs = root.findall('Configuration')
-        for c in configs:
-            config = Configuration()
-            config.loadFrom(c)
-            self.configComboBox.Append(c.attrib['label'],config)
+        # a project only gets its labels listed, see configuration
+        if not self.discardEdits():
+            return
+        if geoCamProject.isProject(fname):
+            project = geoCamProject.Project(fname)
+            keys = project.keys()
+            project.close()
+            configs = [(label, None) for label in keys]
+        else:
+            configs = geoCamEngine.loadConfigurations(fname)
+            keys = geoCamEngine.diffConfigurations({}, configs)[3]
+        # entries of the previous file would shadow the new ones
+        self.clear()
+        for label, config in configs:
+            self.configComboBox.Append(label,config)
         self.filename = fname
+        self.watch(fname, keys)
+
+    def configuration(self, i):
+        # the Configuration of entry i, read from the project when first needed
+        config = self.configComboBox.GetClientData(i)
+        if config is None:
+            project = geoCamProject.Project(self.filename)
+            config = project.load(self.configComboBox.GetString(i))
+            project.close()
+            self.configComboBox.SetClientData(i, config)
+        return config
+
+    def configurations(self):
+        # (label, Configuration) of every entry, the ones not read yet read
+        # in one go
+        entries = [(self.configComboBox.GetString(i),self.configComboBox.GetClientData(i)) for i in range(self.configComboBox.GetCount())]
+        if any(config is None for label, config in entries):
+            project = geoCamProject.Project(self.filename)
+            stored = dict(project.configurations())
+            project.close()
+            for i, (label, config) in enumerate(entries):
+                if config is None:
+                    entries[i] = (label, stored[label])
+                    self.configComboBox.SetClientData(i, stored[label])
+        return entries
+
+    def stamp(self, fname):
+        try:
+            s = os.stat(fname)
+        except OSError:
+            return None
+        return (s.st_mtime, s.st_size)
+
+    def watch(self, fname, keys=None):
+        self.fileKeys = {} if keys is None else keys
+        if fname is None:
+            self.fileStamp = None
+            self.watchTimer.Stop()
+        else:
+            self.fileStamp = self.stamp(fname)
+            self.watchTimer.Start(1000)
+
+    def reload(self):
+        # Applies the entries of the open file that changed since it was last
+        # read or written. Unchanged entries keep their Configuration, and
+        # changed ones are updated in place, so cached results stay valid.
+        # Entries edited here since then are only replaced if the user agrees.
+        # Project entries not read yet are left to be read when selected.
+        project = None
+        try:
+            if geoCamProject.isProject(self.filename):
+                project = geoCamProject.Project(self.filename)
+                newKeys = project.keys()
+                configs = None
+            else:
+                configs = dict(geoCamEngine.loadConfigurations(self.filename))
+                newKeys = geoCamEngine.diffConfigurations({}, configs.items())[3]
+        except (IOError, ValueError, KeyError, sqlite3.Error, xml.etree.ElementTree.ParseError):
+            # probably still being written, or not readable as written by
+            # another program, retried when it changes again
+            if project is not None:
+                project.close()
+            return
+        added, removed, changed = geoCamEngine.diffKeys(self.fileKeys, newKeys)
+        self.fileKeys = newKeys
+        if not (added or removed or changed):
+            if project is not None:
+                project.close()
+            return
+        redraw = False
+        self.watchTimer.Stop()
+        try:
+            for label in removed:
+                i = self.configComboBox.FindString(label)
+                if i != wx.NOT_FOUND:
+                    config = self.configComboBox.GetClientData(i)
+                    if label in self.dirty and self.keepLocal(label, 'was removed from'):
+                        continue
+                    self.dirty.discard(label)
+                    self.configComboBox.Delete(i)
+                    if config is self.currentConfig:
+                        self.setCurrentConfig(None)
+                    elif self.compareConfigs is not None and config in [c[1] for c in self.compareConfigs]:
+                        self.compareConfigs = [c for c in self.compareConfigs if c[1] is not config] or None
+                        redraw = True
+            for label in changed+added:
+                i = self.configComboBox.FindString(label)
+                if i == wx.NOT_FOUND:
+                    self.configComboBox.Append(label,None if configs is None else configs[label])
+                    continue
+                # an added label already here is an entry only kept locally
+                config = self.configComboBox.GetClientData(i)
+                if config is None:
+                    continue
+                if label in self.dirty:
+                    if geoCamEngine.configurationKey(config) == self.fileKeys[label]:
+                        self.dirty.discard(label)
+                        continue
+                    if self.keepLocal(label, 'changed in'):
+                        continue
+                    self.dirty.discard(label)
+                new = project.load(label) if configs is None else configs[label]
+                config.values.update(new.values)
+                config.description = new.description
+                if config is self.currentConfig or (self.compareConfigs is not None and config in [c[1] for c in self.compareConfigs]):
+                    redraw = True
+        finally:
+            if project is not None:
+                project.close()
+            self.watchTimer.Start(1000)
+        if redraw:
+            self.updateGUI()
+
+    def keepLocal(self, label, change):
+        # asks whether the edits of label made here win over the file's version
+        d = wx.MessageDialog(self, label+' '+change+' '+self.filename+' but was edited here. Keep your version or take the one from the file?',
+                             'Configuration changed on disk', wx.YES_NO|wx.ICON_QUESTION)
+        d.SetYesNoLabels('Keep mine', 'Take theirs')
+        keep = d.ShowModal() == wx.ID_YES
+        d.Destroy()
+        return keep
+
+    def discardEdits(self):
+        # whether the edits not saved yet may be thrown away, offering to save
+        # them first
+        if not self.dirty:
+            return True
+        d = wx.MessageDialog(self, 'Edits to {} configurations have not been saved. Save them first?'.format(len(self.dirty)),
+                             'Unsaved edits', wx.YES_NO|wx.CANCEL|wx.ICON_QUESTION)
+        d.SetYesNoCancelLabels('Save', 'Discard', 'Cancel')
+        answer = d.ShowModal()
+        d.Destroy()
+        if answer == wx.ID_YES:
+            self.OnFileSave(None)
+            return not self.dirty
+        return answer == wx.ID_NO
 
     def save(self, fname):
+        # The open project only gets the entries edited since it was read,
+        # other projects and xml files get every entry, atomically in all
+        # cases
         if fname is None:
             fname = self.filename
         if fname is not None:
-            outfile = open(fname,'w')
-            outfile.write('<geoCamera>\n')
-            for i in range(self.configComboBox.GetCount()):
-                self.configComboBox.GetClientData(i).saveTo(outfile,self.configComboBox.GetString(i))
-            outfile.write('</geoCamera>\n')
+            if fname == self.filename and geoCamProject.isProject(fname):
+                configs = [(label, self.configComboBox.GetClientData(self.configComboBox.FindString(label))) for label in self.dirty]
+                project = geoCamProject.Project(fname)
+                project.save(configs, False)
+                project.close()
+                keys = dict(self.fileKeys)
+                keys.update(geoCamEngine.diffConfigurations({}, configs)[3])
+            else:
+                configs = self.configurations()
+                if fname.endswith(geoCamProject.extension) or geoCamProject.isProject(fname):
+                    project = geoCamProject.Project(fname)
+                    project.save(configs)
+                    project.close()
+                else:
+                    geoCamEngine.writeConfigurations(fname, configs)
+                keys = geoCamEngine.diffConfigurations({}, configs)[3]
             self.filename = fname
+            self.dirty = set()
+            self.watch(fname, keys)
+
+    def changed(self):
+        # the current configuration was edited, it is written on the next save
+        self.dirty.add(self.currentLabel)
+        self.updateGUI()
 
-    def setCurrentConfig(self, c):
+    def setCurrentConfig(self, c, label=None):
         self.currentConfig = c
+        self.currentLabel = label
+        self.compareConfigs = None
+        self.pipeline.clear()
+        self.livePipeline.clear()
         self.updateGUI()
         self.enableGUI(c is not None)
 
@@ -146,6 +412,10 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
         self.saveGraphButton.Enable(e)
         self.fixedPixelAspectCheckBox.Enable(e)
         self.fixedBaseFOVCheckBox.Enable(e)
+        for slider in self.liveSliders.values():
+            slider.Enable(e)
+        for ctrl in self.lensTextCtrls.values():
+            ctrl.Enable(e)
 
     def updateGUI(self):
         self.updating = True
@@ -175,6 +445,10 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             self.resolutionTextCtrl.SetValue(str(self.currentConfig.values['resolution']))
             self.rollRangeTextCtrl.SetValue(str(self.currentConfig.values['roll_range']))
             self.configDescriptionTextCtrl.SetValue(self.currentConfig.description)
+            for k, step in GeoCamPlanner.slider_steps.items():
+                self.liveSliders[k].SetValue(int(round(self.currentConfig.values[k]/step)))
+            for k in Configuration.lens:
+                self.lensTextCtrls[k].SetValue(str(self.currentConfig.values[k]))
         else:
             self.enableGUI(False)
             self.baseFXTextCtrl.Clear()
@@ -201,36 +475,56 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             self.resolutionTextCtrl.Clear()
             self.rollRangeTextCtrl.Clear()
             self.configDescriptionTextCtrl.Clear()
+            for ctrl in self.lensTextCtrls.values():
+                ctrl.Clear()
 
         self.updating = False
 
         self.updatePlots()
 
     def updatePlots(self):
+        if self.plots.rendering:
+            self.renderPending = True
+            return
 
         fig = self.plots.get_figure()
-        fig.clear()
-
-        bright_green = (0.0,1.0,0.0,1.0)
-        bright_red = (1.0,0.0,0.0,1.0)
-        pale_green = (0.5,1.0,0.5,1.0)
-        pale_red = (1.0,0.5,0.5,1.0)
-
-        footprint_axes = self.plots.get_figure().add_axes((0.25,0.675,0.7,0.25))
-        geometry_axes = self.plots.get_figure().add_axes((0.025,0.025,0.45,0.575))
-        top_axes = self.plots.get_figure().add_axes((0.5,0.025,0.45,0.575))
-
-        if self.currentConfig is not None:
-            fig.text(.05,.75,self.currentConfig.description)
-
-            zooms = [1.0]
-
-            
-            
-            if self.currentConfig.values['max_zoom'] > 1.0:
-                zooms.append(self.currentConfig.values['max_zoom'])
-
-            legend_axes = [matplotlib.pyplot.Rectangle((0,0),1,1,fc=pale_green), matplotlib.pyplot.Rectangle((0,0),1,1,fc=pale_red)]
+        self.liveBackground = None
+        for a in self.liveArtists:
+            a.remove()
+        self.liveArtists = []
+
+        # the axes and the artists of a configuration are kept from one update
+        # to the next, comparisons are always drawn afresh
+        mode = 'compare' if self.compareConfigs is not None else 'config' if self.currentConfig is not None else None
+        if mode != self.plotMode or mode == 'compare':
+            fig.clear()
+            self.plotMode = mode
+            self.dataArtists = {}
+            self.footprint_axes = fig.add_axes((0.25,0.675,0.7,0.25))
+            self.geometry_axes = fig.add_axes((0.025,0.025,0.45,0.575))
+            self.top_axes = fig.add_axes((0.5,0.025,0.45,0.575))
+            if mode == 'config':
+                self.descriptionText = fig.text(.05,.75,'')
+                self.waterline, = self.geometry_axes.plot([],[],color=(0.0,0.0,1.0,1.0))
+                self.resolutionLine, = self.footprint_axes.plot([],[],'b')
+        footprint_axes = self.footprint_axes
+        geometry_axes = self.geometry_axes
+        top_axes = self.top_axes
+
+        if self.compareConfigs is not None:
+            self.plotComparison()
+        elif self.currentConfig is not None:
+            self.descriptionText.set_text(self.currentConfig.description)
+
+            zooms = geoCamEngine.zoomLevels(self.currentConfig.values)
+            self.pipeline.retain(zooms)
+            for z in list(self.dataArtists):
+                if z not in zooms:
+                    for key, artists in self.dataArtists.pop(z).values():
+                        for a in artists:
+                            a.remove()
+
+            legend_axes = [matplotlib.pyplot.Rectangle((0,0),1,1,fc=self.pale_green), matplotlib.pyplot.Rectangle((0,0),1,1,fc=self.pale_red)]
             footprint_legend_labels = []
             geomtry_legend_labels = []
             if len(zooms) == 1:
@@ -246,162 +540,37 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
                 
             max_y = None
             for z in zooms:
-                
-                hfovx = math.atan2(self.currentConfig.values['ix']/2.0,self.currentConfig.values['fx']*z)
-                pan_factor = math.radians(abs(90.0 - self.currentConfig.values['pan_angle']))
-                if(pan_factor < hfovx):
-                    pan_factor = 0.0
-                else:
-                    pan_factor = pan_factor - hfovx
-                pan_factor = math.cos(pan_factor)
-                
-                #hpfovy = math.atan2(.5,self.currentConfig.values['fy']*z) # half the fov of a pixel
-
-                sensor_angles = []
-                ref = self.currentConfig.values['iy']/2.0
-                for i in range(self.currentConfig.values['iy']+1):
-                    sensor_angles.append(math.atan2(i-ref,self.currentConfig.values['fy']*z))
-
-                sensor_angles_x = []
-                ref = self.currentConfig.values['ix']/2.0
-                N = 100
-                for i in range(N):  # range(self.currentConfig.values['ix']+1):
-                    i *= self.currentConfig.values['ix']/float(N)
-                    sensor_angles_x.append(math.atan2(i-ref,self.currentConfig.values['fx']*z))
-
-                rr = math.radians(self.currentConfig.values['roll_range'])
-                #start_angle =  math.radians(self.currentConfig.values['tilt_angle'])-hpfovy*(self.currentConfig.values['iy']-1)
-                #end_angle = start_angle + 2*hpfovy*self.currentConfig.values['iy']
-                start_angle =  math.radians(self.currentConfig.values['tilt_angle'])+sensor_angles[0] 
-                end_angle = start_angle + (sensor_angles[-1]-sensor_angles[0])
-
-                x = []
-                y = []
-                ok = []
-                notOk = []
-
-                top_x_ok = []
-                top_y_ok = []
-                top_x_notOk = []
-                top_y_notOk = []
-                
-                angles = []
-
-                for sa in sensor_angles:
-                    if sa-rr < sensor_angles[0]:
-                        angles.append(start_angle-rr+(sa-sensor_angles[0]))
-                for sa in sensor_angles:
-                    angles.append(start_angle+(sa-sensor_angles[0]))
-                for sa in sensor_angles:
-                    if sa+rr > sensor_angles[-1]:
-                        angles.append(start_angle+rr+(sa-sensor_angles[0]))
-
-                #for p in range(self.currentConfig.values['iy']):
-                    #if start_angle-rr+2*p*hpfovy < start_angle:
-                        #angles.append(start_angle-rr+2*p*hpfovy)
-                #for p in range(self.currentConfig.values['iy']):
-                    #angles.append(start_angle+2*p*hpfovy)
-                #for p in range(self.currentConfig.values['iy']):
-                    #if start_angle+rr+2*p*hpfovy > end_angle:
-                        #angles.append(start_angle+rr+2*p*hpfovy)
-
-                last_angle = None
-                for a in angles:
-                    if a < 0.0 and last_angle is not None:
-                        #rc = -self.currentConfig.values['height']/math.tan(a)
-                        rn = -self.currentConfig.values['height']/math.tan(last_angle)
-                        rf = -self.currentConfig.values['height']/math.tan(a)
-                        rm = rn+((rf-rn)/2.0)
-                        x.append(rm*pan_factor)
-                        y.append(rf-rn)
-                        if max_y is None:
-                            max_y = y[-1]
-                        else:
-                            max_y = max(max_y, y[-1])
-                        if y[-1] > self.currentConfig.values['resolution']:
-                            ok.append(False)
-                        else:
-                            ok.append(True)
-                        notOk.append(not ok[-1])
-                        for xa in sensor_angles_x:
-                            b = xa + math.radians(self.currentConfig.values['pan_angle'])
-                            if ok[-1]:
-                                top_x_ok.append(math.sin(b)*rm)
-                                top_y_ok.append(math.cos(b)*rm)
-                            else:
-                                top_x_notOk.append(math.sin(b)*rm)
-                                top_y_notOk.append(math.cos(b)*rm)
-                    last_angle = a
+                fp = geoCamEngine.Footprint(self.currentConfig.values, z, GeoCamPlanner.plot_columns, max(1,(self.currentConfig.values['iy']+1)//GeoCamPlanner.plot_rows), self.pipeline)
+                if fp.max_y is not None:
+                    if max_y is None:
+                        max_y = fp.max_y
+                    else:
+                        max_y = max(max_y, fp.max_y)
+
+                # only the groups drawn from stage results that changed are
+                # replaced
+                keys = self.plotKeys(fp)
+                drawn = self.dataArtists.setdefault(z, {})
+                changed = [g for g in GeoCamPlanner.plot_groups if keys[g] is None or g not in drawn or drawn[g][0] != keys[g]]
+                for g in changed:
+                    for a in drawn.pop(g, (None, []))[1]:
+                        a.remove()
+                for g, artists in self.plotFootprint(fp, groups=changed).items():
+                    drawn[g] = (keys[g], artists)
 
                 if z > 1.0:
-                    footprint_axes.fill_between(x,y,where=ok,color=bright_green)
-                    footprint_axes.fill_between(x,y,where=notOk,color=bright_red)
-                    legend_axes.append(matplotlib.pyplot.Rectangle((0,0),1,1,fc=bright_green))
+                    legend_axes.append(matplotlib.pyplot.Rectangle((0,0),1,1,fc=self.bright_green))
                     footprint_legend_labels.append('footprint < resolution (max zoom)')
-                    legend_axes.append(matplotlib.pyplot.Rectangle((0,0),1,1,fc=bright_red))
+                    legend_axes.append(matplotlib.pyplot.Rectangle((0,0),1,1,fc=self.bright_red))
                     footprint_legend_labels.append('footprint > resolution (max zoom)')
                     geomtry_legend_labels.append('always visible (max zoom)')
                     geomtry_legend_labels.append('sometimes visible (max zoom)')
-                    top_axes.plot(top_x_ok,top_y_ok,'.',color=bright_green)
-                    top_axes.plot(top_x_notOk,top_y_notOk,'.',color=bright_red)
-                else:
-                    footprint_axes.fill_between(x,y,where=ok,color=pale_green)
-                    footprint_axes.fill_between(x,y,where=notOk,color=pale_red)
-                    top_axes.plot(top_x_ok,top_y_ok,'.',color=pale_green)
-                    top_axes.plot(top_x_notOk,top_y_notOk,'.',color=pale_red)
-
-                patches = []
-                if rr > 0.0:
-                    ep = (0.0,self.currentConfig.values['height'])
-                    if start_angle-rr < 0.0:
-                        nc = (-self.currentConfig.values['height']/math.tan(start_angle-rr),0.0)
-                    else:
-                        nc = (self.currentConfig.values['range'],self.currentConfig.values['height']+self.currentConfig.values['range']*math.tan(start_angle-rr))
-                    if end_angle+rr < 0.0:
-                        fc = (-self.currentConfig.values['height']/math.tan(end_angle+rr),0.0)
-                    else:
-                        fc = (self.currentConfig.values['range'],self.currentConfig.values['height']+self.currentConfig.values['range']*math.tan(end_angle+rr))
-
-                    print (ep,nc,fc)
-                    polygon = matplotlib.patches.Polygon((ep,nc,fc), True)
-                    patches.append(polygon)
-
-                    
-                    x = []
-                    y0 = []
-                    y1 = []
-                    for i in range(1000):
-                        x.append(self.currentConfig.values['range']*i/1000.0)
-                        y0.append(max(0.0,(x[-1]/pan_factor)*math.tan(start_angle-rr)+self.currentConfig.values['height']))
-                        y1.append(max(0.0,(x[-1]/pan_factor)*math.tan(end_angle+rr)+self.currentConfig.values['height']))
-                    if z > 1.0:
-                        geometry_axes.fill_between(x,y1,y0,color=bright_red)
-                    else:
-                        geometry_axes.fill_between(x,y1,y0,color=pale_red)
-
-
-                x = []
-                y0 = []
-                y1 = []
-                for i in range(1000):
-                    x.append(self.currentConfig.values['range']*i/1000.0)
-                    pan_factor
-                    y0.append(max(0.0,x[-1]*math.tan(start_angle+rr)+self.currentConfig.values['height']))
-                    y1.append(max(0.0,x[-1]*math.tan(end_angle-rr)+self.currentConfig.values['height']))
-                if z > 1.0:
-                    geometry_axes.fill_between(x,y1,y0,color=bright_green)
-                else:
-                    geometry_axes.fill_between(x,y1,y0,color=pale_green)
-
-                p = matplotlib.collections.PatchCollection(patches)
-                #geometry_axes.add_collection(p)
-                    
-                geometry_axes.plot([0,self.currentConfig.values['range']],[0.0,0.0],color=(0.0,0.0,1.0,1.0))
-
 
+            self.waterline.set_data([0,self.currentConfig.values['range']],[0.0,0.0])
             x = [0, self.currentConfig.values['range']]
             y = [self.currentConfig.values['resolution'],self.currentConfig.values['resolution']]
-            legend_axes.append(footprint_axes.plot(x,y,'b'))
+            self.resolutionLine.set_data(x,y)
+            legend_axes.append(self.resolutionLine)
             
             footprint_legend_labels.append('target resolution')
             geomtry_legend_labels.append('waterline')
@@ -414,6 +583,10 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
         
             geometry_axes.set_xlim((0,self.currentConfig.values['range']))
             geometry_axes.set_aspect('equal')
+            # the data limits still hold the envelopes that were replaced
+            geometry_axes.relim()
+            geometry_axes.set_autoscaley_on(True)
+            geometry_axes.autoscale_view(scalex=False)
             #geometry_axes.set_ylim((0,max(self.currentConfig.values['height']*2.0,self.currentConfig.values['range']*.2)))
 
             top_axes.set_xlim((-self.currentConfig.values['range'],self.currentConfig.values['range']))
@@ -431,8 +604,150 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             footprint_axes.legend(legend_axes,footprint_legend_labels,loc=2)
             geometry_axes.legend(legend_axes,geomtry_legend_labels, loc=2)
 
-
-        self.plots.draw()
+        self.plots.render(self.renderer, self.OnPlotsRendered)
+
+    def OnPlotsRendered(self, error):
+        # Catches up with whatever changed while the frame was being drawn.
+        if error is not None:
+            sys.stderr.write('drawing the plots failed: '+str(error)+'\n')
+        if self.renderPending:
+            self.renderPending = False
+            self.updatePlots()
+        elif self.livePending:
+            self.updateLivePlots()
+
+    def plotKeys(self, fp):
+        # What each group of artists of a Footprint is drawn from, None when
+        # that isn't known and the group has to be drawn again.
+        if fp.stages is None:
+            return dict((g, None) for g in GeoCamPlanner.plot_groups)
+        values = self.currentConfig.values
+        return {'footprint':(fp.pan_factor,fp.stages['ranges'],fp.stages['classify']),
+                'top':fp.stages['top'],
+                'geometry':(fp.stages['angles'],fp.pan_factor,values['height'],values['range'])}
+
+    def plotFootprint(self, fp, animated=False, groups=None):
+        # Draws the groups of artists of one zoom level, all by default, and
+        # returns them as {group: artists} so the live slider path can replace
+        # them without redrawing the axes and full redraws can keep the ones
+        # that did not change.
+        if groups is None:
+            groups = GeoCamPlanner.plot_groups
+        if fp.zoom > 1.0:
+            ok_color = self.bright_green
+            notOk_color = self.bright_red
+        else:
+            ok_color = self.pale_green
+            notOk_color = self.pale_red
+
+        drawn = {}
+        if 'footprint' in groups:
+            artists = []
+            artists.append(self.footprint_axes.fill_between(fp.x,fp.y,where=fp.ok,color=ok_color,animated=animated))
+            artists.append(self.footprint_axes.fill_between(fp.x,fp.y,where=fp.notOk,color=notOk_color,animated=animated))
+            drawn['footprint'] = artists
+        if 'top' in groups:
+            artists = []
+            artists += self.top_axes.plot(fp.top_x_ok,fp.top_y_ok,'.',color=ok_color,animated=animated)
+            artists += self.top_axes.plot(fp.top_x_notOk,fp.top_y_notOk,'.',color=notOk_color,animated=animated)
+            drawn['top'] = artists
+        if 'geometry' in groups:
+            artists = []
+            always, sometimes = geoCamEngine.verticalEnvelopes(self.currentConfig.values, fp)
+            if sometimes is not None:
+                if fp.zoom > 1.0:
+                    artists += self.geometry_axes.fill(sometimes[:,0],sometimes[:,1],color=self.bright_red,animated=animated)
+                else:
+                    artists += self.geometry_axes.fill(sometimes[:,0],sometimes[:,1],color=self.pale_red,animated=animated)
+            if fp.zoom > 1.0:
+                artists += self.geometry_axes.fill(always[:,0],always[:,1],color=self.bright_green,animated=animated)
+            else:
+                artists += self.geometry_axes.fill(always[:,0],always[:,1],color=self.pale_green,animated=animated)
+            drawn['geometry'] = artists
+        return drawn
+
+    def plotComparison(self):
+        # Overlays the min zoom footprint, always visible envelope and top
+        # down coverage of the configurations being compared. Each panel is
+        # drawn as a single collection so many configurations stay cheap.
+        labels = [c[0] for c in self.compareConfigs]
+        batch = geoCamEngine.FootprintBatch([c[1].values for c in self.compareConfigs])
+        range_max = batch.range_max.max()
+        cmap = matplotlib.pyplot.get_cmap('tab20')
+        colors = [cmap(i%20) for i in range(len(labels))]
+
+        segments = [numpy.column_stack((batch.x[n,:batch.count[n]],batch.y[n,:batch.count[n]])) for n in range(len(labels))]
+        self.footprint_axes.add_collection(matplotlib.collections.LineCollection(segments,colors=colors))
+        resolutions = [((0.0,r),(range_max,r)) for r in batch.resolution[:,0]]
+        self.footprint_axes.add_collection(matplotlib.collections.LineCollection(resolutions,colors=colors,linestyles='dashed'))
+
+        self.geometry_axes.add_collection(matplotlib.collections.PolyCollection(batch.envelopes(range_max),facecolors=colors,alpha=0.3))
+        self.geometry_axes.plot([0,range_max],[0.0,0.0],color=(0.0,0.0,1.0,1.0))
+
+        verts, n, near, far = batch.topDownSectors(batch.ok)
+        self.top_axes.add_collection(matplotlib.collections.PolyCollection(verts,facecolors=[colors[i] for i in n],alpha=0.3))
+
+        # footprints blow up near the horizon, so scale to the targets instead
+        self.footprint_axes.set_ylim((0,batch.resolution.max()*4.0))
+        self.footprint_axes.set_xlim((0,range_max))
+        self.footprint_axes.set_xlabel('range (m)')
+        self.footprint_axes.set_ylabel('pixel footprint (m)')
+        self.footprint_axes.set_title('Pixel footprint vs range (dashed: target resolution)')
+
+        self.geometry_axes.set_xlim((0,range_max))
+        self.geometry_axes.set_ylim((0,max(batch.height.max()*2.0,range_max*.2)))
+        self.geometry_axes.set_aspect('equal')
+        self.geometry_axes.set_xlabel('range (m)')
+        self.geometry_axes.set_ylabel('height (m)')
+        self.geometry_axes.set_title('Always visible vertical field of view')
+
+        self.top_axes.set_xlim((-range_max,range_max))
+        self.top_axes.set_ylim((-range_max,range_max))
+        self.top_axes.set_aspect('equal')
+        self.top_axes.set_xlabel('across track range (m)')
+        self.top_axes.set_ylabel('along track range (m)')
+        self.top_axes.set_title('Top down coverage with footprint < resolution')
+
+        legend_axes = [matplotlib.pyplot.Rectangle((0,0),1,1,fc=c) for c in colors]
+        self.footprint_axes.legend(legend_axes,labels,loc=2,fontsize='small',ncol=1+len(labels)//8)
+
+    def updateLivePlots(self):
+        # Redraws only the data artists over a cached background. Axis limits
+        # and titles are left as they were when the drag started and are
+        # refreshed by the full updatePlots once the slider is released.
+        if self.plots.rendering:
+            # picked up again once the frame being drawn is shown
+            return
+        self.livePending = False
+        if self.currentConfig is None or not self.liveDragging:
+            return
+        if self.compareConfigs is not None:
+            self.updatePlots()
+            return
+        fig = self.plots.get_figure()
+        if self.liveBackground is None:
+            for drawn in self.dataArtists.values():
+                for key, artists in drawn.values():
+                    for a in artists:
+                        a.remove()
+            self.dataArtists = {}
+            self.plots.draw()
+            self.liveBackground = self.plots.copy_from_bbox(fig.bbox)
+        else:
+            self.plots.restore_region(self.liveBackground)
+
+        for a in self.liveArtists:
+            a.remove()
+        self.liveArtists = []
+        zooms = geoCamEngine.zoomLevels(self.currentConfig.values)
+        self.livePipeline.retain(zooms)
+        for z in zooms:
+            fp = geoCamEngine.Footprint(self.currentConfig.values, z, GeoCamPlanner.live_columns, max(1,(self.currentConfig.values['iy']+1)//GeoCamPlanner.live_rows), self.livePipeline)
+            for artists in self.plotFootprint(fp, True).values():
+                self.liveArtists += artists
+        for a in self.liveArtists:
+            a.axes.draw_artist(a)
+        self.plots.blit(fig.bbox)
 
 
     def updateFromControl(self,ctrl):
@@ -449,7 +764,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
         x = self.updateFromControl(self.imagerSizeXTextCtrl)
         if x is not None:
             self.currentConfig.values['ix'] = int(x)
-            self.updateGUI()
+            self.changed()
 
     def OnImagerSizeXMMChanged(self, evt):
         x = self.updateFromControl(self.imagerSizeXMMTextCtrl)
@@ -460,14 +775,14 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
                 self.currentConfig.values['iymm'] *= x/oldValue
             if not self.fixedBaseFOVCheckBox.GetValue():
                 self.setFX(self.currentConfig.values['fx']*oldValue/x)
-            self.updateGUI()
+            self.changed()
                     
             
     def OnImagerSizeYChanged(self, evt):
         y = self.updateFromControl(self.imagerSizeYTextCtrl)
         if y is not None:
             self.currentConfig.values['iy'] = int(y)
-            self.updateGUI()
+            self.changed()
 
     def OnImagerSizeYMMChanged(self, evt):
         y = self.updateFromControl(self.imagerSizeYMMTextCtrl)
@@ -478,31 +793,31 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
                 self.currentConfig.values['ixmm'] *= y/oldValue
             if not self.fixedBaseFOVCheckBox.GetValue():
                 self.setFY(self.currentConfig.values['fy']*oldValue/y)
-            self.updateGUI()
+            self.changed()
             
     def OnRangeChanged(self, evt):
         r = self.updateFromControl(self.rangeTextCtrl)
         if r is not None:
             self.currentConfig.values['range'] = r
-            self.updateGUI()
+            self.changed()
 
     def OnHeightChanged(self, evt):
         h = self.updateFromControl(self.heightTextCtrl)
         if h is not None:
             self.currentConfig.values['height'] = h
-            self.updateGUI()
+            self.changed()
 
     def OnMaxZoomChanged(self, evt):
         z = self.updateFromControl(self.maxZoomTextCtrl)
         if z is not None:
             self.currentConfig.values['max_zoom'] = z
-            self.updateGUI()
+            self.changed()
 
     def OnResolutionChanged(self, evt):
         r = self.updateFromControl(self.resolutionTextCtrl)
         if r is not None:
             self.currentConfig.values['resolution'] = r
-            self.updateGUI()
+            self.changed()
 
     def setFX(self,fx,scale = 1.0):
         if fx is not None:
@@ -510,7 +825,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             self.currentConfig.values['fx'] = fx/scale
             if self.fixedPixelAspectCheckBox.GetValue():
                 self.currentConfig.values['fy'] = self.currentConfig.values['fx']/pr
-            self.updateGUI()
+            self.changed()
 
     def setFovX(self,fovx,scale = 1.0):
         if fovx is not None:
@@ -524,7 +839,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             self.currentConfig.values['fy'] = fy/scale
             if self.fixedPixelAspectCheckBox.GetValue():
                 self.currentConfig.values['fx'] = self.currentConfig.values['fy']/pr
-            self.updateGUI()
+            self.changed()
 
     def setFovY(self,fovy,scale=1.0):
         if fovy is not None:
@@ -541,7 +856,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
                 self.currentConfig.values['ixmm']=x*self.currentConfig.values['ix']/self.currentConfig.values['fx']
                 if self.fixedPixelAspectCheckBox.GetValue():
                     self.currentConfig.values['iymm'] = self.currentConfig.values['ixmm']/pr
-                self.updateGUI()
+                self.changed()
         else:
             self.setFX(self.updateFromControl(self.baseFXMMTextCtrl)*self.currentConfig.values['ix']/self.currentConfig.values['ixmm'])
             
@@ -557,7 +872,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
                 self.currentConfig.values['iymm']=y*self.currentConfig.values['iy']/self.currentConfig.values['fy']
                 if self.fixedPixelAspectCheckBox.GetValue():
                     self.currentConfig.values['ixmm'] = self.currentConfig.values['iymm']/pr
-                self.updateGUI()
+                self.changed()
         else:
             self.setFY(self.updateFromControl(self.baseFYMMTextCtrl)*self.currentConfig.values['iy']/self.currentConfig.values['iymm'])
             
@@ -572,7 +887,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             x = self.updateFromControl(self.maxFXTextCtrl)
             if x is not None:
                 self.currentConfig.values['max_zoom'] = x/self.currentConfig.values['fx']
-                self.updateGUI()
+                self.changed()
         else:
             self.setFX(self.updateFromControl(self.maxFXTextCtrl),self.currentConfig.values['max_zoom'])
         
@@ -581,7 +896,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             x = self.updateFromControl(self.maxFXMMTextCtrl)
             if x is not None:
                 self.currentConfig.values['max_zoom'] = x/( self.currentConfig.values['ixmm']*self.currentConfig.values['fx']/self.currentConfig.values['ix'])
-                self.updateGUI()
+                self.changed()
         else:
             self.setFX(self.updateFromControl(self.maxFXMMTextCtrl)*self.currentConfig.values['ix']/self.currentConfig.values['ixmm'],self.currentConfig.values['max_zoom'])
             
@@ -590,7 +905,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             y = self.updateFromControl(self.maxFYTextCtrl)
             if y is not None:
                 self.currentConfig.values['max_zoom'] = y/self.currentConfig.values['fy']
-                self.updateGUI()
+                self.changed()
         else:
             self.setFY(self.updateFromControl(self.maxFYTextCtrl),self.currentConfig.values['max_zoom'])
 
@@ -599,7 +914,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             y = self.updateFromControl(self.maxFYMMTextCtrl)
             if y is not None:
                 self.currentConfig.values['max_zoom'] = y/( self.currentConfig.values['iymm']*self.currentConfig.values['fy']/self.currentConfig.values['iy'])
-                self.updateGUI()
+                self.changed()
         else:
             self.setFY(self.updateFromControl(self.maxFYMMTextCtrl)*self.currentConfig.values['iy']/self.currentConfig.values['iymm'],self.currentConfig.values['max_zoom'])
         
@@ -608,7 +923,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             fovx = self.updateFromControl(self.maxFovXTextCtrl)
             if fovx is not None:
                 self.currentConfig.values['max_zoom'] = (self.currentConfig.values['ix']/2.0)/math.tan(math.radians(fovx/2.0))/self.currentConfig.values['fx']
-                self.updateGUI()
+                self.changed()
         else:
             self.setFovX(self.updateFromControl(self.maxFovXTextCtrl),self.currentConfig.values['max_zoom'])
 
@@ -617,7 +932,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             fovy = self.updateFromControl(self.maxFovYTextCtrl)
             if fovy is not None:
                 self.currentConfig.values['max_zoom'] = (self.currentConfig.values['iy']/2.0)/math.tan(math.radians(fovy/2.0))/self.currentConfig.values['fy']
-                self.updateGUI()
+                self.changed()
         else:
             self.setFovY(self.updateFromControl(self.maxFovYTextCtrl),self.currentConfig.values['max_zoom'])
 
@@ -625,26 +940,95 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
         a = self.updateFromControl(self.panAngleTextCtrl)
         if a is not None:
             self.currentConfig.values['pan_angle'] = a
-            self.updateGUI()
+            self.changed()
 
 
     def OnTiltAngleChanged(self, evt):
         a = self.updateFromControl(self.tiltAngleTextCtrl)
         if a is not None:
             self.currentConfig.values['tilt_angle'] = a
-            self.updateGUI()
+            self.changed()
 
     def OnRollRangeChanged(self, evt):
         rr = self.updateFromControl(self.rollRangeTextCtrl)
         if rr is not None:
             self.currentConfig.values['roll_range'] = rr
+            self.changed()
+
+    def setLens(self, k):
+        v = self.updateFromControl(self.lensTextCtrls[k])
+        if v is not None:
+            self.currentConfig.values[k] = v
+            self.changed()
+
+    def OnK1Changed(self, evt):
+        self.setLens('k1')
+
+    def OnK2Changed(self, evt):
+        self.setLens('k2')
+
+    def OnK3Changed(self, evt):
+        self.setLens('k3')
+
+    def OnP1Changed(self, evt):
+        self.setLens('p1')
+
+    def OnP2Changed(self, evt):
+        self.setLens('p2')
+
+    def setSliderValue(self, k, position):
+        value = round(position*GeoCamPlanner.slider_steps[k],6)
+        self.currentConfig.values[k] = value
+        self.dirty.add(self.currentLabel)
+        self.updating = True
+        self.sliderTextCtrls[k].SetValue(str(value))
+        self.updating = False
+
+    def liveSlider(self, evt, k):
+        if self.currentConfig is not None:
+            self.setSliderValue(k, evt.GetPosition())
+            self.liveDragging = True
+            # coalesce thumb events so only the latest value gets drawn
+            if not self.livePending:
+                self.livePending = True
+                wx.CallAfter(self.updateLivePlots)
+
+    def liveSliderDone(self, evt, k):
+        self.liveDragging = False
+        if self.currentConfig is not None:
+            self.setSliderValue(k, evt.GetPosition())
             self.updateGUI()
 
+    def OnTiltSlider(self, evt):
+        self.liveSlider(evt, 'tilt_angle')
+
+    def OnTiltSliderDone(self, evt):
+        self.liveSliderDone(evt, 'tilt_angle')
+
+    def OnPanSlider(self, evt):
+        self.liveSlider(evt, 'pan_angle')
+
+    def OnPanSliderDone(self, evt):
+        self.liveSliderDone(evt, 'pan_angle')
+
+    def OnHeightSlider(self, evt):
+        self.liveSlider(evt, 'height')
+
+    def OnHeightSliderDone(self, evt):
+        self.liveSliderDone(evt, 'height')
+
+    def OnRollRangeSlider(self, evt):
+        self.liveSlider(evt, 'roll_range')
+
+    def OnRollRangeSliderDone(self, evt):
+        self.liveSliderDone(evt, 'roll_range')
+
     def OnFileNew(self, evt):
-        self.clear()
+        if self.discardEdits():
+            self.clear()
 
     def OnFileOpen(self, evt):
-        d = wx.FileDialog(self,wildcard='*.xml',style=wx.FD_OPEN)
+        d = wx.FileDialog(self,wildcard=GeoCamPlanner.file_wildcard,style=wx.FD_OPEN)
         ret = d.ShowModal()
         if ret == wx.ID_OK:
             self.open(str(d.GetPath()))
@@ -656,7 +1040,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             self.save(self.filename)
 
     def OnFileSaveAs(self, evt):
-        d = wx.FileDialog(self,wildcard='*.xml',style=wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
+        d = wx.FileDialog(self,wildcard=GeoCamPlanner.file_wildcard,style=wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
         ret = d.ShowModal()
         if ret == wx.ID_OK:
             self.save(str(d.GetPath()))
@@ -665,6 +1049,7 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
         d = wx.FileDialog(self,wildcard='*.png',style=wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
         ret = d.ShowModal()
         if ret == wx.ID_OK:
+            self.renderer.wait()
             self.plots.get_figure().savefig(str(d.GetPath()))
 
 
@@ -686,20 +1071,128 @@ class GeoCamPlanner(geoCamPlannerUI.geoCamPlannerBase):
             else:
                 new_config = Configuration()
             self.configComboBox.Append(config,new_config)
-            self.setCurrentConfig(new_config)
+            self.dirty.add(config)
+            self.setCurrentConfig(new_config, config)
         else:
-            self.setCurrentConfig(self.configComboBox.GetClientData(config_id))
+            self.setCurrentConfig(self.configuration(config_id), config)
+
+    def OnCompare(self, evt):
+        labels = [self.configComboBox.GetString(i) for i in range(self.configComboBox.GetCount())]
+        d = wx.MultiChoiceDialog(self,'Configurations to overlay','Compare configurations',labels)
+        if self.compareConfigs is not None:
+            d.SetSelections([labels.index(c[0]) for c in self.compareConfigs if c[0] in labels])
+        if d.ShowModal() == wx.ID_OK:
+            selections = d.GetSelections()
+            if len(selections):
+                self.compareConfigs = [(labels[i],self.configuration(i)) for i in selections]
+            else:
+                self.compareConfigs = None
+            self.updatePlots()
+
+    def OnMountingUncertainty(self, evt):
+        if self.currentConfig is None:
+            return
+        d = wx.TextEntryDialog(self,'Mounting errors as field=distribution:width, distribution is one of '+', '.join(geoCamMonteCarlo.distributions),'Mounting uncertainty','height=normal:0.5 tilt_angle=normal:0.5 pan_angle=normal:1.0')
+        if d.ShowModal() != wx.ID_OK:
+            return
+        try:
+            errors = geoCamMonteCarlo.parseErrors(d.GetValue().split())
+        except ValueError as e:
+            wx.MessageBox(str(e),'Mounting uncertainty',wx.OK|wx.ICON_ERROR,self)
+            return
+        ranges = numpy.linspace(0.0,self.currentConfig.values['range'],500)
+        with wx.BusyCursor():
+            probability = geoCamMonteCarlo.usableProbability(self.currentConfig.values,errors,ranges)
+        frame = wxmpl.PlotFrame(self,-1,'Mounting uncertainty: '+self.configComboBox.GetValue())
+        axes = frame.get_figure().gca()
+        axes.plot(ranges,probability,'b')
+        axes.fill_between(ranges,geoCamMonteCarlo.nominalCoverage(self.currentConfig.values,ranges),color=self.pale_green)
+        axes.set_xlim((0,self.currentConfig.values['range']))
+        axes.set_ylim((0,1.05))
+        axes.set_xlabel('range (m)')
+        axes.set_ylabel('probability footprint < resolution')
+        axes.set_title(d.GetValue())
+        frame.draw()
+        frame.Show()
+
+    def OnExportGeoJSON(self, evt):
+        if self.currentConfig is None:
+            return
+        d = wx.FileDialog(self,'Ship track (time,latitude,longitude,heading)',wildcard='*.csv',style=wx.FD_OPEN)
+        if d.ShowModal() != wx.ID_OK:
+            return
+        track = str(d.GetPath())
+        d = wx.FileDialog(self,wildcard='*.geojson',style=wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
+        if d.ShowModal() == wx.ID_OK:
+            with wx.BusyCursor(), open(track) as infile, open(str(d.GetPath()),'w') as outfile:
+                geoCamExport.exportGeoJSON(self.currentConfig.values,self.configComboBox.GetValue(),geoCamExport.readTrack(infile),outfile)
+
+    def OnExportLookupTable(self, evt):
+        if self.currentConfig is None:
+            return
+        d = wx.FileDialog(self,wildcard='*.lut',style=wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
+        if d.ShowModal() == wx.ID_OK:
+            with open(str(d.GetPath()),'wb') as outfile:
+                geoCamTable.writeTables(outfile,self.currentConfig.values,geoCamTable.zoomSteps(self.currentConfig.values))
+
+    def OnRankCatalog(self, evt):
+        # ranks the catalog's sensors and lenses for the current mounting,
+        # trying tilts within 10 degrees of the current one, and adds the
+        # chosen ones to the configurations
+        if self.currentConfig is None:
+            return
+        d = wx.FileDialog(self,'Sensor catalog',wildcard='*.db',style=wx.FD_OPEN)
+        if d.ShowModal() != wx.ID_OK:
+            return
+        tilt = self.currentConfig.values['tilt_angle']
+        with wx.BusyCursor():
+            db = geoCamCatalog.openCatalog(str(d.GetPath()))
+            shortlist = geoCamCatalog.rank(geoCamCatalog.combinations(db), self.currentConfig.values, numpy.arange(tilt-10.0,tilt+10.5,1.0))
+            db.close()
+        if not shortlist:
+            return
+        choices = ['{} (tilt {:.1f}, {:.0f} m^2, {:.0f} m)'.format(label, config.values['tilt_angle'], area, max_range) for label, config, area, max_range in shortlist]
+        d = wx.MultiChoiceDialog(self,'Configurations to add','Sensor catalog',choices)
+        if d.ShowModal() == wx.ID_OK:
+            for i in d.GetSelections():
+                if self.configComboBox.FindString(shortlist[i][0]) == wx.NOT_FOUND:
+                    self.configComboBox.Append(shortlist[i][0],shortlist[i][1])
+                    self.dirty.add(shortlist[i][0])
+
+    def OnCompiledKernel(self, evt):
+        if self.compiledKernelMenuItem.IsChecked():
+            values = Configuration().values
+            if self.currentConfig is not None:
+                values = self.currentConfig.values
+            mismatches = geoCamEngine.checkKernel(values)
+            if mismatches:
+                self.compiledKernelMenuItem.Check(False)
+                wx.MessageBox('The compiled kernel does not match the reference for: '+', '.join(mismatches),'Compiled kernel',wx.OK|wx.ICON_ERROR,self)
+                return
+            geoCamEngine.setKernel('numba')
+        else:
+            geoCamEngine.setKernel('numpy')
+        self.updatePlots()
+
+    def OnWatchTimer(self, evt):
+        if self.filename is None:
+            return
+        stamp = self.stamp(self.filename)
+        if stamp is not None and stamp != self.fileStamp:
+            self.fileStamp = stamp
+            self.reload()
 
     def OnConfigCombo(self, evt):
         config_id = self.configComboBox.GetSelection()
         if  config_id == wx.NOT_FOUND:
             self.setCurrentConfig(None)
         else:
-            self.setCurrentConfig(self.configComboBox.GetClientData(config_id))
+            self.setCurrentConfig(self.configuration(config_id), self.configComboBox.GetString(config_id))
 
     def OnConfigDescriptionText(self, evt):
         if not self.updating:
             self.currentConfig.description = self.configDescriptionTextCtrl.GetValue()
+            self.dirty.add(self.currentLabel)
             #self.updatePlots()
 
     def OnConfigDescriptionTextEnter(self, evt):
@@ -31,6 +31,21 @@ class geoCamPlannerBase(wx.Frame):
         self.geoCamPlannerFrame_menubar.FileSaveAsMenuItem = self.FileMenuItem.Append(wx.ID_SAVEAS, "", "")
         self.Bind(wx.EVT_MENU, self.OnFileSaveAs, id=wx.ID_SAVEAS)
         self.geoCamPlannerFrame_menubar.Append(self.FileMenuItem, "&File")
+        self.ToolsMenuItem = wx.Menu()
+        self.geoCamPlannerFrame_menubar.compareMenuItem = self.ToolsMenuItem.Append(wx.ID_ANY, "&Compare configurations...", "")
+        self.Bind(wx.EVT_MENU, self.OnCompare, self.geoCamPlannerFrame_menubar.compareMenuItem)
+        self.geoCamPlannerFrame_menubar.mountingUncertaintyMenuItem = self.ToolsMenuItem.Append(wx.ID_ANY, "&Mounting uncertainty...", "")
+        self.Bind(wx.EVT_MENU, self.OnMountingUncertainty, self.geoCamPlannerFrame_menubar.mountingUncertaintyMenuItem)
+        self.geoCamPlannerFrame_menubar.exportGeoJSONMenuItem = self.ToolsMenuItem.Append(wx.ID_ANY, "Export &GeoJSON...", "")
+        self.Bind(wx.EVT_MENU, self.OnExportGeoJSON, self.geoCamPlannerFrame_menubar.exportGeoJSONMenuItem)
+        self.geoCamPlannerFrame_menubar.exportLookupTableMenuItem = self.ToolsMenuItem.Append(wx.ID_ANY, "Export &lookup table...", "")
+        self.Bind(wx.EVT_MENU, self.OnExportLookupTable, self.geoCamPlannerFrame_menubar.exportLookupTableMenuItem)
+        self.geoCamPlannerFrame_menubar.rankCatalogMenuItem = self.ToolsMenuItem.Append(wx.ID_ANY, "&Rank sensor catalog...", "")
+        self.Bind(wx.EVT_MENU, self.OnRankCatalog, self.geoCamPlannerFrame_menubar.rankCatalogMenuItem)
+        self.ToolsMenuItem.AppendSeparator()
+        self.geoCamPlannerFrame_menubar.compiledKernelMenuItem = self.ToolsMenuItem.Append(wx.ID_ANY, "Use compiled &kernel", "", wx.ITEM_CHECK)
+        self.Bind(wx.EVT_MENU, self.OnCompiledKernel, self.geoCamPlannerFrame_menubar.compiledKernelMenuItem)
+        self.geoCamPlannerFrame_menubar.Append(self.ToolsMenuItem, "&Tools")
         self.SetMenuBar(self.geoCamPlannerFrame_menubar)
         # Menu Bar end
 
@@ -48,7 +63,7 @@ class geoCamPlannerBase(wx.Frame):
         self.configDescriptionTextCtrl = wx.TextCtrl(self, wx.ID_ANY, "", style=wx.TE_MULTILINE | wx.TE_PROCESS_ENTER)
         configSizer.Add(self.configDescriptionTextCtrl, 1, wx.EXPAND, 0)
 
-        paramsSizer = wx.FlexGridSizer(8, 5, 2, 2)
+        paramsSizer = wx.FlexGridSizer(9, 5, 2, 2)
         controlsSizer.Add(paramsSizer, 3, wx.EXPAND, 0)
 
         paramsSizer.Add((20, 20), 0, 0, 0)
@@ -202,10 +217,69 @@ class geoCamPlannerBase(wx.Frame):
         self.rollRangeTextCtrl = wx.TextCtrl(self, wx.ID_ANY, "", style=wx.TE_PROCESS_ENTER)
         paramsSizer.Add(self.rollRangeTextCtrl, 0, wx.EXPAND, 0)
 
+        self.radialDistortionLabel = wx.StaticText(self, wx.ID_ANY, "radial distortion (k1,k2,k3)")
+        paramsSizer.Add(self.radialDistortionLabel, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT, 0)
+
+        sizer_7 = wx.BoxSizer(wx.HORIZONTAL)
+        paramsSizer.Add(sizer_7, 1, wx.EXPAND, 0)
+
+        self.k1TextCtrl = wx.TextCtrl(self, wx.ID_ANY, "", style=wx.TE_PROCESS_ENTER)
+        sizer_7.Add(self.k1TextCtrl, 1, wx.EXPAND, 0)
+
+        self.k2TextCtrl = wx.TextCtrl(self, wx.ID_ANY, "", style=wx.TE_PROCESS_ENTER)
+        sizer_7.Add(self.k2TextCtrl, 1, wx.EXPAND, 0)
+
+        self.k3TextCtrl = wx.TextCtrl(self, wx.ID_ANY, "", style=wx.TE_PROCESS_ENTER)
+        paramsSizer.Add(self.k3TextCtrl, 0, wx.EXPAND, 0)
+
+        self.tangentialDistortionLabel = wx.StaticText(self, wx.ID_ANY, "tangential distortion (p1,p2)")
+        paramsSizer.Add(self.tangentialDistortionLabel, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT, 0)
+
+        sizer_8 = wx.BoxSizer(wx.HORIZONTAL)
+        paramsSizer.Add(sizer_8, 1, wx.EXPAND, 0)
+
+        self.p1TextCtrl = wx.TextCtrl(self, wx.ID_ANY, "", style=wx.TE_PROCESS_ENTER)
+        sizer_8.Add(self.p1TextCtrl, 1, wx.EXPAND, 0)
+
+        self.p2TextCtrl = wx.TextCtrl(self, wx.ID_ANY, "", style=wx.TE_PROCESS_ENTER)
+        sizer_8.Add(self.p2TextCtrl, 1, wx.EXPAND, 0)
+
         paramsSizer.AddGrowableCol(1)
         paramsSizer.AddGrowableCol(2)
         paramsSizer.AddGrowableCol(4)
 
+        slidersSizer = wx.FlexGridSizer(1, 8, 2, 2)
+        mainSizer.Add(slidersSizer, 0, wx.EXPAND, 0)
+
+        self.tiltSliderLabel = wx.StaticText(self, wx.ID_ANY, "tilt (deg)")
+        slidersSizer.Add(self.tiltSliderLabel, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT, 0)
+
+        self.tiltSlider = wx.Slider(self, wx.ID_ANY, 0, -900, 900)
+        slidersSizer.Add(self.tiltSlider, 1, wx.EXPAND, 0)
+
+        self.panSliderLabel = wx.StaticText(self, wx.ID_ANY, "pan (deg)")
+        slidersSizer.Add(self.panSliderLabel, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT, 0)
+
+        self.panSlider = wx.Slider(self, wx.ID_ANY, 0, -360, 720)
+        slidersSizer.Add(self.panSlider, 1, wx.EXPAND, 0)
+
+        self.heightSliderLabel = wx.StaticText(self, wx.ID_ANY, "height (m)")
+        slidersSizer.Add(self.heightSliderLabel, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT, 0)
+
+        self.heightSlider = wx.Slider(self, wx.ID_ANY, 0, 0, 1000)
+        slidersSizer.Add(self.heightSlider, 1, wx.EXPAND, 0)
+
+        self.rollRangeSliderLabel = wx.StaticText(self, wx.ID_ANY, "roll (deg)")
+        slidersSizer.Add(self.rollRangeSliderLabel, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALIGN_RIGHT, 0)
+
+        self.rollRangeSlider = wx.Slider(self, wx.ID_ANY, 0, 0, 200)
+        slidersSizer.Add(self.rollRangeSlider, 1, wx.EXPAND, 0)
+
+        slidersSizer.AddGrowableCol(1)
+        slidersSizer.AddGrowableCol(3)
+        slidersSizer.AddGrowableCol(5)
+        slidersSizer.AddGrowableCol(7)
+
         self.SetSizer(mainSizer)
         mainSizer.Fit(self)
 
@@ -241,6 +315,19 @@ class geoCamPlannerBase(wx.Frame):
         self.saveGraphButton.Bind(wx.EVT_BUTTON, self.OnSaveGraph)
         self.tiltAngleTextCtrl.Bind(wx.EVT_TEXT_ENTER, self.OnTiltAngleChanged)
         self.rollRangeTextCtrl.Bind(wx.EVT_TEXT_ENTER, self.OnRollRangeChanged)
+        self.k1TextCtrl.Bind(wx.EVT_TEXT_ENTER, self.OnK1Changed)
+        self.k2TextCtrl.Bind(wx.EVT_TEXT_ENTER, self.OnK2Changed)
+        self.k3TextCtrl.Bind(wx.EVT_TEXT_ENTER, self.OnK3Changed)
+        self.p1TextCtrl.Bind(wx.EVT_TEXT_ENTER, self.OnP1Changed)
+        self.p2TextCtrl.Bind(wx.EVT_TEXT_ENTER, self.OnP2Changed)
+        self.tiltSlider.Bind(wx.EVT_SCROLL_THUMBTRACK, self.OnTiltSlider)
+        self.tiltSlider.Bind(wx.EVT_SCROLL_CHANGED, self.OnTiltSliderDone)
+        self.panSlider.Bind(wx.EVT_SCROLL_THUMBTRACK, self.OnPanSlider)
+        self.panSlider.Bind(wx.EVT_SCROLL_CHANGED, self.OnPanSliderDone)
+        self.heightSlider.Bind(wx.EVT_SCROLL_THUMBTRACK, self.OnHeightSlider)
+        self.heightSlider.Bind(wx.EVT_SCROLL_CHANGED, self.OnHeightSliderDone)
+        self.rollRangeSlider.Bind(wx.EVT_SCROLL_THUMBTRACK, self.OnRollRangeSlider)
+        self.rollRangeSlider.Bind(wx.EVT_SCROLL_CHANGED, self.OnRollRangeSliderDone)
         # end wxGlade
 
     def OnFileNew(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
@@ -259,6 +346,30 @@ class geoCamPlannerBase(wx.Frame):
         print("Event handler 'OnFileSaveAs' not implemented!")
         event.Skip()
 
+    def OnCompare(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnCompare' not implemented!")
+        event.Skip()
+
+    def OnMountingUncertainty(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnMountingUncertainty' not implemented!")
+        event.Skip()
+
+    def OnExportGeoJSON(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnExportGeoJSON' not implemented!")
+        event.Skip()
+
+    def OnExportLookupTable(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnExportLookupTable' not implemented!")
+        event.Skip()
+
+    def OnRankCatalog(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnRankCatalog' not implemented!")
+        event.Skip()
+
+    def OnCompiledKernel(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnCompiledKernel' not implemented!")
+        event.Skip()
+
     def OnConfigCombo(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
         print("Event handler 'OnConfigCombo' not implemented!")
         event.Skip()
@@ -379,4 +490,56 @@ class geoCamPlannerBase(wx.Frame):
         print("Event handler 'OnRollRangeChanged' not implemented!")
         event.Skip()
 
+    def OnK1Changed(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnK1Changed' not implemented!")
+        event.Skip()
+
+    def OnK2Changed(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnK2Changed' not implemented!")
+        event.Skip()
+
+    def OnK3Changed(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnK3Changed' not implemented!")
+        event.Skip()
+
+    def OnP1Changed(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnP1Changed' not implemented!")
+        event.Skip()
+
+    def OnP2Changed(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnP2Changed' not implemented!")
+        event.Skip()
+
+    def OnTiltSlider(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnTiltSlider' not implemented!")
+        event.Skip()
+
+    def OnTiltSliderDone(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnTiltSliderDone' not implemented!")
+        event.Skip()
+
+    def OnPanSlider(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnPanSlider' not implemented!")
+        event.Skip()
+
+    def OnPanSliderDone(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnPanSliderDone' not implemented!")
+        event.Skip()
+
+    def OnHeightSlider(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnHeightSlider' not implemented!")
+        event.Skip()
+
+    def OnHeightSliderDone(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnHeightSliderDone' not implemented!")
+        event.Skip()
+
+    def OnRollRangeSlider(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnRollRangeSlider' not implemented!")
+        event.Skip()
+
+    def OnRollRangeSliderDone(self, event):  # wxGlade: geoCamPlannerBase.<event_handler>
+        print("Event handler 'OnRollRangeSliderDone' not implemented!")
+        event.Skip()
+
 # end of class geoCamPlannerBase
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+# Project store for large libraries of configurations, kept in a SQLite
+# file with one indexed row per configuration and a table of cached metrics.
+# Opening a project reads nothing until configurations are asked for, and
+# saving writes only the configurations that changed since they were read or
+# last saved, in a single transaction so a project is never left half
+# written. geoCamera xml files import and export without loss.
+
+import argparse
+import collections
+import sqlite3
+import geoCamEngine
+import geoCamSensitivity
+from geoCamEngine import Configuration
+
+extension = '.gcproj'
+schema_version = 1
+
+def isProject(fname):
+    try:
+        with open(fname, 'rb') as infile:
+            return infile.read(16) == b'SQLite format 3\x00'
+    except IOError:
+        return False
+
+
+class Project:
+    fields = [d[0] for d in Configuration.defaults]
+
+    def __init__(self, fname):
+        self.fname = fname
+        self.db = sqlite3.connect(fname)
+        columns = ', '.join(f+(' integer' if f in Configuration.ints else ' real')+' not null' for f in Project.fields)
+        with self.db:
+            self.db.execute('create table if not exists configurations (id integer primary key, label text unique not null, '
+                            'description text not null, key text not null, '+columns+')')
+            self.db.execute('create table if not exists metrics (label text not null, name text not null, key text not null, '
+                            'value real, primary key (label, name))')
+            version = self.db.execute('pragma user_version').fetchone()[0]
+            if version == 0:
+                self.db.execute('pragma user_version = {}'.format(schema_version))
+            elif version != schema_version:
+                raise ValueError('unsupported project version {} in {}'.format(version, fname))
+
+    def close(self):
+        self.db.close()
+
+    def labels(self):
+        return [r[0] for r in self.db.execute('select label from configurations order by id')]
+
+    def keys(self):
+        # {label: configurationKey} in the order added, without reading the
+        # configurations
+        return collections.OrderedDict(self.db.execute('select label, key from configurations order by id'))
+
+    def rows(self, query, args=()):
+        for r in self.db.execute('select label, description, key, '+', '.join(Project.fields)+' from configurations '+query, args):
+            config = Configuration()
+            config.description = r[1]
+            for f, v in zip(Project.fields, r[3:]):
+                config.values[f] = v
+            yield r[0], config
+
+    def load(self, label):
+        for l, config in self.rows('where label = ?', (label,)):
+            return config
+        raise KeyError('no configuration labeled '+label+' in '+self.fname)
+
+    def configurations(self):
+        # (label, Configuration) of every configuration, in the order added
+        return list(self.rows('order by id'))
+
+    def save(self, configs, remove=True):
+        # Writes the configurations of configs, a list of (label,
+        # Configuration), that are new or changed. With remove, stored ones
+        # missing from configs are deleted, without it only the stored keys
+        # of configs are read. Returns the number of rows written and deleted.
+        keys = [(label, config, geoCamEngine.configurationKey(config)) for label, config in configs]
+        if remove:
+            stored = self.keys()
+        else:
+            stored = dict(r for k in keys for r in self.db.execute('select label, key from configurations where label = ?', (k[0],)))
+        dirty = [(label, config, key) for label, config, key in keys if stored.get(label) != key]
+        labels = set(k[0] for k in keys)
+        gone = [label for label in stored if label not in labels] if remove else []
+        with self.db:
+            self.db.executemany('insert into configurations (label, description, key, '+', '.join(Project.fields)+') values ('+
+                                ', '.join('?'*(3+len(Project.fields)))+') on conflict(label) do update set description = excluded.description, '
+                                'key = excluded.key, '+', '.join(f+' = excluded.'+f for f in Project.fields),
+                                [(label, config.description, key)+tuple(config.values[f] for f in Project.fields) for label, config, key in dirty])
+            self.db.executemany('delete from configurations where label = ?', [(label,) for label in gone])
+            self.db.executemany('delete from metrics where label = ?', [(label,) for label in gone])
+        return len(dirty), len(gone)
+
+    def importXML(self, fname):
+        # adds or replaces the configurations of a geoCamera file
+        return self.save(geoCamEngine.loadConfigurations(fname), False)[0]
+
+    def exportXML(self, fname):
+        configs = self.configurations()
+        geoCamEngine.writeConfigurations(fname, configs)
+        return len(configs)
+
+    def metrics(self, labels=None, chunk=512):
+        # {label: {metric: value}} of geoCamSensitivity.metrics, computed for
+        # the configurations whose cached values are missing or stale
+        if labels is None:
+            labels = self.labels()
+        current = self.keys()
+        cached = {}
+        for label, name, key, value in self.db.execute('select label, name, key, value from metrics'):
+            if label in current and current[label] == key:
+                cached.setdefault(label, {})[name] = value
+        stale = [l for l in labels if len(cached.get(l, {})) != len(geoCamSensitivity.metrics)]
+        for i in range(0, len(stale), chunk):
+            configs = [(l, self.load(l)) for l in stale[i:i+chunk]]
+            figures = geoCamSensitivity.figures(geoCamEngine.FootprintBatch([c.values for l, c in configs]))
+            rows = []
+            for (label, config), f in zip(configs, figures):
+                cached[label] = dict(zip(geoCamSensitivity.metrics, [float(v) for v in f]))
+                rows += [(label, name, current[label], value) for name, value in cached[label].items()]
+            with self.db:
+                self.db.executemany('insert or replace into metrics (label, name, key, value) values (?, ?, ?, ?)', rows)
+        return dict((l, cached[l]) for l in labels)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='geoCamera project store.')
+    parser.add_argument('project', help='project file, created if missing')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    p = commands.add_parser('import', help='add or replace the configurations of geoCamera xml files')
+    p.add_argument('files', nargs='+')
+    p = commands.add_parser('export', help='write every configuration to a geoCamera xml file')
+    p.add_argument('file')
+    commands.add_parser('list', help='list configurations with their cached metrics')
+    args = parser.parse_args()
+
+    project = Project(args.project)
+    if args.command == 'import':
+        for fname in args.files:
+            print('{}: {} configurations written'.format(fname, project.importXML(fname)))
+    elif args.command == 'export':
+        print('exported {} configurations'.format(project.exportXML(args.file)))
+    else:
+        print('label\tmax usable range (m)\tblind zone (m)\tarea (m^2)')
+        for label, m in project.metrics().items():
+            print('{}\t{:.1f}\t{:.1f}\t{:.0f}'.format(label, *[m[n] for n in geoCamSensitivity.metrics]))
+    project.close()
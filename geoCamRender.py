@@ -0,0 +1,56 @@
+# Draws matplotlib Agg canvases on a worker thread so the GUI thread keeps
+# handling events during heavy redraws. Agg keeps the GIL for the whole draw
+# of each artist, so the GUI thread can still wait as long as the slowest
+# artist takes; keep single artists light. The caller must leave the figure
+# alone until the done callback for it has run; done is called on the worker
+# thread with the canvas and the exception raised while drawing, if any.
+# Only the latest request waiting to be drawn is kept.
+
+import threading
+import traceback
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+class BackgroundRenderer:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.request = None
+        self.busy = False
+        self.thread = threading.Thread(target=self.run, name='geoCamRender')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, canvas, done):
+        with self.condition:
+            self.request = (canvas, done)
+            self.condition.notify_all()
+
+    def wait(self):
+        # blocks until nothing is waiting or being drawn
+        with self.condition:
+            while self.busy or self.request is not None:
+                self.condition.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.request is None:
+                    self.condition.wait()
+                canvas, done = self.request
+                self.request = None
+                self.busy = True
+            error = None
+            try:
+                # only the Agg part of the canvas' draw, the copy to the
+                # window is left to the GUI thread
+                FigureCanvasAgg.draw(canvas)
+            except Exception as e:
+                error = e
+            try:
+                done(canvas, error)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+# Pan angles for a rig of K identical cameras. Each camera keeps its own
+# tilt and height and the pans are searched to maximize the ground area,
+# around the ship and within range, where at least one camera's footprint
+# meets the resolution. With a minimum overlap every camera must share at
+# least that many degrees of azimuth with another camera.
+#
+# Coverage is counted on a grid of azimuth bins (one per pan step) and range
+# bins. A camera's usable ranges don't depend on its pan, so moving a camera
+# only shifts its window of azimuth bins and every pan of one camera can be
+# scored at once with a cumulative sum. The search places the cameras
+# greedily, then improves one camera at a time until no move helps. Further
+# restarts from random orders and starting pans run in parallel.
+
+import argparse
+import concurrent.futures
+import math
+import numpy
+import geoCamEngine
+from geoCamEngine import Configuration
+
+
+class RigCoverage:
+    def __init__(self, valuesList, step=1.0, overlap=0.0, rangeBins=400):
+        if abs(360.0/step-round(360.0/step)) > 1e-9:
+            raise ValueError('pan step must divide 360 degrees')
+        self.step = step
+        self.overlap = overlap
+        self.bins = int(round(360.0/step))
+        batch = geoCamEngine.FootprintBatch(valuesList)
+        range_max = batch.range_max.max()
+        dr = range_max/rangeBins
+        self.ranges = (numpy.arange(rangeBins)+0.5)*dr
+        # ground area of one bin at each range
+        self.cell = math.radians(step)*self.ranges*dr
+        # usable ranges of each camera, limited to its own range
+        self.masks = batch.covered(batch.ok, self.ranges) & (self.ranges <= batch.range_max)
+        # first and last azimuth bin of each camera relative to its pan bin
+        offsets = numpy.degrees(batch.azimuth-numpy.radians(numpy.array([v['pan_angle'] for v in valuesList]))[:,numpy.newaxis])/step
+        self.lo = numpy.ceil(offsets[:,0]-1e-9).astype(int)
+        self.hi = numpy.floor(offsets[:,1]+1e-9).astype(int)
+        self.hi = numpy.minimum(self.hi, self.lo+self.bins-1)
+        self.count = len(valuesList)
+
+    def window(self, i, p):
+        return (p+numpy.arange(self.lo[i],self.hi[i]+1))%self.bins
+
+    def windowSums(self, i, g):
+        # sum of g (bins,) over camera i's window at every pan bin
+        s = numpy.concatenate(([0.0],numpy.cumsum(numpy.concatenate((g,g)))))
+        start = (numpy.arange(self.bins)+self.lo[i])%self.bins
+        return s[start+self.hi[i]-self.lo[i]+1]-s[start]
+
+    def union(self, pans, skip=None):
+        cover = numpy.zeros((self.bins,len(self.ranges)), dtype=bool)
+        for i, p in enumerate(pans):
+            if i != skip and p is not None:
+                cover[self.window(i,p)] |= self.masks[i]
+        return cover
+
+    def azimuths(self, i, p):
+        a = numpy.zeros(self.bins)
+        a[self.window(i,p)] = 1.0
+        return a
+
+    def coverage(self, pans):
+        return (self.union(pans).astype(float) @ self.cell).sum()
+
+    def overlaps(self, pans):
+        # degrees of azimuth shared by every pair of cameras
+        a = numpy.array([self.azimuths(i,p) for i, p in enumerate(pans)])
+        o = (a @ a.T)*self.step
+        numpy.fill_diagonal(o, 0.0)
+        return o
+
+    def gains(self, i, pans):
+        # area camera i adds to the others at every pan bin
+        free = ~self.union(pans, i)
+        return self.windowSums(i, (free & self.masks[i]).astype(float) @ self.cell)
+
+    def feasible(self, i, pans):
+        # pan bins of camera i at which it overlaps another placed camera by
+        # the minimum overlap and every camera relying on it for its overlap
+        # still does
+        overlap = self.overlap
+        ok = numpy.ones(self.bins, dtype=bool)
+        others = [k for k, p in enumerate(pans) if k != i and p is not None]
+        if overlap <= 0.0 or not others:
+            return ok
+        shared = dict((k, self.windowSums(i, self.azimuths(k, pans[k]))*self.step) for k in others)
+        ok = numpy.zeros(self.bins, dtype=bool)
+        for k in others:
+            ok |= shared[k] >= overlap-1e-9
+        if all(p is not None for p in pans):
+            o = self.overlaps(pans)
+            o[:,i] = 0.0
+            for k in others:
+                if o[k].max() < overlap-1e-9:
+                    ok &= shared[k] >= overlap-1e-9
+        return ok
+
+    def best(self, i, pans, current=None):
+        gain = self.gains(i, pans)
+        ok = self.feasible(i, pans)
+        if not ok.any():
+            return current
+        gain = numpy.where(ok, gain, -1.0)
+        p = int(gain.argmax())
+        if current is not None and ok[current] and gain[current] >= gain[p]-1e-9:
+            return current
+        return p
+
+    def greedy(self, order, first=None):
+        pans = [None]*self.count
+        for n, i in enumerate(order):
+            if n == 0 and first is not None:
+                pans[i] = first
+            else:
+                pans[i] = self.best(i, pans)
+                if pans[i] is None:
+                    pans[i] = 0
+        return pans
+
+    def improve(self, pans, passes=20):
+        pans = list(pans)
+        for n in range(passes):
+            moved = False
+            for i in range(self.count):
+                p = self.best(i, pans, pans[i])
+                if p != pans[i]:
+                    pans[i] = p
+                    moved = True
+            if not moved:
+                break
+        return pans
+
+    def valid(self, pans):
+        if self.overlap <= 0.0 or self.count < 2:
+            return True
+        return bool((self.overlaps(pans).max(axis=1) >= self.overlap-1e-9).all())
+
+
+def searchRestarts(rig, restarts, seed, greedyFirst):
+    # Best (coverage, pans) over restarts, the first one a plain greedy pass
+    # in camera order if greedyFirst.
+    rng = numpy.random.default_rng(seed)
+    best = None
+    for r in range(restarts):
+        if r == 0 and greedyFirst:
+            pans = rig.greedy(range(rig.count))
+        else:
+            pans = rig.greedy(rng.permutation(rig.count), int(rng.integers(rig.bins)))
+        pans = rig.improve(pans)
+        if not rig.valid(pans):
+            continue
+        c = rig.coverage(pans)
+        if best is None or c > best[0]+1e-9:
+            best = (c, pans)
+    return best
+
+def allocatePans(valuesList, overlap=0.0, step=1.0, restarts=16, processes=1, seed=None):
+    # Returns (coverage, pan angles) of the best allocation found, coverage
+    # in m^2, or None if no allocation meets the overlap.
+    rig = RigCoverage(valuesList, step, overlap)
+    seeds = numpy.random.SeedSequence(seed).spawn(max(1,processes))
+    counts = [restarts//len(seeds)+(i < restarts%len(seeds)) for i in range(len(seeds))]
+    if len(seeds) == 1:
+        results = [searchRestarts(rig, counts[0], seeds[0], True)]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(len(seeds)) as executor:
+            futures = [executor.submit(searchRestarts, rig, c, s, i == 0) for i, (c, s) in enumerate(zip(counts, seeds)) if c]
+            results = [f.result() for f in futures]
+    results = [r for r in results if r is not None]
+    if not results:
+        return None
+    c, pans = max(results, key=lambda r: r[0])
+    return float(c), [float(p*step) for p in pans]
+
+def rigConfigurations(template, tilts, heights):
+    # one values dict per camera from a template and per camera tilts and
+    # heights (a single value applies to every camera)
+    count = max(len(tilts), len(heights))
+    valuesList = []
+    for i in range(count):
+        v = dict(template)
+        v['tilt_angle'] = tilts[min(i,len(tilts)-1)]
+        v['height'] = heights[min(i,len(heights)-1)]
+        valuesList.append(v)
+    return valuesList
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Pan angles of a camera rig maximizing usable coverage.')
+    parser.add_argument('filename', help='geoCamera xml file')
+    parser.add_argument('label', help='label of the camera configuration')
+    parser.add_argument('-k', '--cameras', type=int, required=True)
+    parser.add_argument('--tilts', type=float, nargs='+', help='tilt of each camera, or one for all')
+    parser.add_argument('--heights', type=float, nargs='+', help='height of each camera, or one for all')
+    parser.add_argument('--overlap', type=float, default=0.0, help='minimum azimuth overlap of each camera with another (degrees)')
+    parser.add_argument('-s', '--step', type=float, default=1.0, help='pan step (degrees)')
+    parser.add_argument('-r', '--restarts', type=int, default=16)
+    parser.add_argument('-p', '--processes', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('-o', '--output', help='geoCamera xml file to write the cameras to')
+    args = parser.parse_args()
+
+    config = geoCamEngine.findConfiguration(args.filename, args.label)
+    tilts = args.tilts if args.tilts else [config.values['tilt_angle']]
+    heights = args.heights if args.heights else [config.values['height']]
+    if len(tilts) not in (1,args.cameras) or len(heights) not in (1,args.cameras):
+        parser.error('give one tilt and height or one per camera')
+    valuesList = rigConfigurations(config.values, tilts*args.cameras if len(tilts) == 1 else tilts,
+                                   heights*args.cameras if len(heights) == 1 else heights)
+    result = allocatePans(valuesList, args.overlap, args.step, args.restarts, args.processes, args.seed)
+    if result is None:
+        print('no allocation meets an overlap of {} degrees'.format(args.overlap))
+        raise SystemExit(1)
+    coverage, pans = result
+    configs = []
+    for i, (v, p) in enumerate(zip(valuesList, pans)):
+        c = Configuration(config)
+        c.values.update(v)
+        c.values['pan_angle'] = p
+        configs.append((args.label+'_'+str(i+1), c))
+        print('{}\tpan {:.1f}\ttilt {:.1f}\theight {:.1f}'.format(configs[-1][0], p, v['tilt_angle'], v['height']))
+    print('coverage {:.0f} m^2'.format(coverage))
+    if args.output is not None:
+        geoCamEngine.writeConfigurations(args.output, configs)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+# Sensitivity of a design to each of its parameters. Every field of
+# Configuration.defaults is moved up and down by a step and the change of
+# three figures is reported:
+#
+#   max usable range  farthest range where the footprint meets resolution
+#   blind zone        range below which the water is not always seen
+#   coverage area     area within range where the footprint meets resolution
+#
+# Angles and the height step by one unit (degree or metre) so they can be
+# compared directly, the other fields by one percent of their value. A step
+# that would leave the field's valid range stops at its limit, and that side
+# then gets a one sided difference. All perturbations of all configurations
+# go through FootprintBatch together.
+
+import argparse
+import numpy
+import geoCamEngine
+from geoCamEngine import Configuration
+
+unit_steps = {'tilt_angle':1.0, 'pan_angle':1.0, 'roll_range':1.0, 'height':1.0}
+relative_step = 0.01
+zero_step = 0.01
+# lowest valid value of the fields that have one
+lower_limits = {'ix':1, 'iy':1, 'fx':0.0, 'fy':0.0, 'ixmm':0.0, 'iymm':0.0, 'max_zoom':1.0,
+                'range':0.0, 'height':0.0, 'resolution':0.0, 'roll_range':0.0}
+metrics = ('max_range','blind_zone','area')
+
+def fieldStep(values, field):
+    if field in unit_steps:
+        return unit_steps[field]
+    step = abs(values[field])*relative_step
+    if field in Configuration.ints:
+        return max(1, int(round(step)))
+    return step if step > 0.0 else zero_step
+
+def figures(batch):
+    # (max usable range, blind zone, coverage area) of every configuration
+    area, max_range = batch.usableArea()
+    lowest = (batch.start_angle+batch.roll)[:,0]
+    with numpy.errstate(divide='ignore'):
+        blind = numpy.where(lowest < 0.0, -batch.height[:,0]/numpy.tan(numpy.minimum(lowest, 0.0)), numpy.inf)
+    return numpy.stack((max_range, blind, area), axis=1)
+
+def sensitivities(valuesList, fields=None, chunk=512):
+    # Returns the base figures (configuration, metric) and the differences
+    # per step (configuration, field, metric), central unless a limit cut the
+    # step down, along with the fields and their steps (configuration, field).
+    if fields is None:
+        fields = [d[0] for d in Configuration.defaults]
+    perturbed = []
+    steps = numpy.zeros((len(valuesList),len(fields)))
+    # distance between the up and down values actually used
+    spans = numpy.zeros((len(valuesList),len(fields)))
+    for n, values in enumerate(valuesList):
+        perturbed.append(values)
+        for f, field in enumerate(fields):
+            step = fieldStep(values, field)
+            steps[n,f] = step
+            down = values[field]-step
+            if field in lower_limits:
+                down = max(down, min(values[field], lower_limits[field]))
+            spans[n,f] = step+values[field]-down
+            perturbed.append(dict(values, **{field:values[field]+step}))
+            perturbed.append(dict(values, **{field:down}))
+    # chunks keep configurations with very different imager sizes from
+    # padding one another too much
+    results = numpy.concatenate([figures(geoCamEngine.FootprintBatch(perturbed[i:i+chunk])) for i in range(0, len(perturbed), chunk)])
+    results = results.reshape((len(valuesList),1+2*len(fields),len(metrics)))
+    base = results[:,0]
+    up = results[:,1::2]
+    down = results[:,2::2]
+    with numpy.errstate(invalid='ignore'):
+        change = (up-down)*(steps/spans)[:,:,numpy.newaxis]
+    return base, change, fields, steps
+
+def rankedTable(label, base, change, fields, steps, by='area'):
+    # lines of a table of one configuration, largest change of by first
+    m = metrics.index(by)
+    order = sorted(range(len(fields)), key=lambda f: -abs(change[f,m]) if numpy.isfinite(change[f,m]) else 0.0)
+    lines = ['{}: max usable range {:.1f} m, blind zone {:.1f} m, coverage {:.0f} m^2'.format(label, *base),
+             'parameter\tstep\tmax range (m)\tblind zone (m)\tarea (m^2)']
+    for f in order:
+        lines.append('{}\t{:g}\t{:+.2f}\t{:+.2f}\t{:+.0f}'.format(fields[f], steps[f], *change[f]))
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sensitivity of usable range, blind zone and coverage to every parameter.')
+    parser.add_argument('filename', help='geoCamera xml file')
+    parser.add_argument('labels', nargs='*', help='configurations to analyse, all if omitted')
+    parser.add_argument('--by', choices=metrics, default='area', help='figure to rank the parameters by')
+    args = parser.parse_args()
+
+    configs = geoCamEngine.loadConfigurations(args.filename)
+    if args.labels:
+        missing = [l for l in args.labels if l not in [c[0] for c in configs]]
+        if missing:
+            parser.error('no configuration labeled '+', '.join(missing))
+        configs = [c for c in configs if c[0] in args.labels]
+    base, change, fields, steps = sensitivities([c.values for l, c in configs])
+    for n, (label, config) in enumerate(configs):
+        if n:
+            print('')
+        print('\n'.join(rankedTable(label, base[n], change[n], fields, steps[n], args.by)))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# Binary range lookup tables for onboard software, so the footprint of each
+# image row can be looked up at runtime instead of recomputed. One file
+# holds the tables of one configuration at each zoom step. Everything is
+# little-endian and every table can be memory mapped in place.
+#
+# Version 1 layout:
+#
+#   header (32 bytes)
+#     magic        8 bytes  b'GEOCAMLT'
+#     version      uint32   1
+#     header_size  uint32   32, the directory starts here
+#     tables       uint32   number of zoom steps
+#     rows         uint32   image rows per table (iy)
+#     row_size     uint32   24, bytes per row record
+#     reserved     uint32   0
+#
+#   directory, one 56 byte entry per table
+#     zoom, tilt_angle, height, roll_range, resolution, fy   float64
+#     offset                                                   uint64, of the rows from the file start
+#
+#   rows, one 24 byte record per image row for each table
+#     near, far, footprint, near_min, far_max, footprint_max   float32
+#
+# Row i lies between row edges i and i+1 counted from the bottom of the
+# image, as in geoCamEngine, so it is image row iy-1-i of an image stored
+# top row first. near and far are the ground ranges (m) of the row's lower
+# and upper edge along the centre column with the ship level and footprint
+# is far-near. near_min, far_max and footprint_max are the nearest, farthest
+# and largest of these over the roll range. Ranges are inf where the edge
+# doesn't reach the water, as are the footprints of rows whose far edge
+# doesn't.
+
+import argparse
+import math
+import numpy
+import geoCamEngine
+
+magic = b'GEOCAMLT'
+version = 1
+header_dtype = numpy.dtype([('magic','S8'),('version','<u4'),('header_size','<u4'),('tables','<u4'),
+                            ('rows','<u4'),('row_size','<u4'),('reserved','<u4')])
+directory_dtype = numpy.dtype([('zoom','<f8'),('tilt_angle','<f8'),('height','<f8'),('roll_range','<f8'),
+                               ('resolution','<f8'),('fy','<f8'),('offset','<u8')])
+row_dtype = numpy.dtype([('near','<f4'),('far','<f4'),('footprint','<f4'),
+                         ('near_min','<f4'),('far_max','<f4'),('footprint_max','<f4')])
+
+def groundRange(height, angles):
+    with numpy.errstate(divide='ignore'):
+        return numpy.where(angles < 0.0, -height/numpy.tan(numpy.minimum(angles, 0.0)), numpy.inf)
+
+def rowTable(values, z):
+    # row records of one zoom step
+    edges = math.radians(values['tilt_angle'])+geoCamEngine.rayTable(values, z).rows
+    rr = math.radians(values['roll_range'])
+    h = values['height']
+    level = groundRange(h, edges)
+    down = groundRange(h, edges-rr)
+    up = groundRange(h, edges+rr)
+    rows = numpy.empty(values['iy'], dtype=row_dtype)
+    rows['near'] = level[:-1]
+    rows['far'] = level[1:]
+    with numpy.errstate(invalid='ignore'):
+        rows['footprint'] = numpy.where(numpy.isinf(level[1:]), numpy.inf, level[1:]-level[:-1])
+        rows['footprint_max'] = numpy.where(numpy.isinf(up[1:]), numpy.inf, numpy.maximum(rows['footprint'], up[1:]-up[:-1]))
+    rows['near_min'] = down[:-1]
+    rows['far_max'] = up[1:]
+    return rows
+
+def zoomSteps(values, steps=None):
+    # zoom factors from 1 to max_zoom, the planner's zoom levels by default
+    if steps is None or values['max_zoom'] <= 1.0:
+        return geoCamEngine.zoomLevels(values)
+    return list(numpy.linspace(1.0, values['max_zoom'], max(2,steps)))
+
+def writeTables(outfile, values, zooms):
+    header = numpy.zeros(1, dtype=header_dtype)
+    header['magic'] = magic
+    header['version'] = version
+    header['header_size'] = header_dtype.itemsize
+    header['tables'] = len(zooms)
+    header['rows'] = values['iy']
+    header['row_size'] = row_dtype.itemsize
+    directory = numpy.zeros(len(zooms), dtype=directory_dtype)
+    offset = header_dtype.itemsize+directory_dtype.itemsize*len(zooms)
+    for i, z in enumerate(zooms):
+        directory[i] = (z, values['tilt_angle'], values['height'], values['roll_range'], values['resolution'],
+                        values['fy']*z, offset+i*row_dtype.itemsize*values['iy'])
+    outfile.write(header.tobytes())
+    outfile.write(directory.tobytes())
+    for z in zooms:
+        outfile.write(rowTable(values, z).tobytes())
+
+def readTables(fname):
+    # Returns the directory and a list of memory mapped row tables, one per
+    # zoom step.
+    header = numpy.fromfile(fname, dtype=header_dtype, count=1)
+    if len(header) == 0 or header['magic'][0] != magic:
+        raise ValueError(fname+' is not a geoCamera lookup table')
+    if header['version'][0] != version:
+        raise ValueError('unsupported lookup table version {}'.format(header['version'][0]))
+    header = header[0]
+    directory = numpy.memmap(fname, dtype=directory_dtype, mode='r', offset=int(header['header_size']), shape=(int(header['tables']),))
+    tables = [numpy.memmap(fname, dtype=row_dtype, mode='r', offset=int(d['offset']), shape=(int(header['rows']),)) for d in directory]
+    return directory, tables
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write the range lookup tables of a configuration.')
+    parser.add_argument('filename', help='geoCamera xml file')
+    parser.add_argument('label', help='label of the configuration')
+    parser.add_argument('output', help='lookup table file to write')
+    parser.add_argument('-n', '--steps', type=int, help='zoom steps from 1 to max zoom, the min and max zoom if omitted')
+    args = parser.parse_args()
+
+    config = geoCamEngine.findConfiguration(args.filename, args.label)
+    zooms = zoomSteps(config.values, args.steps)
+    with open(args.output, 'wb') as outfile:
+        writeTables(outfile, config.values, zooms)
+    print('wrote {} tables of {} rows to {}'.format(len(zooms), config.values['iy'], args.output))